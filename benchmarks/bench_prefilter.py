@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+EventSieve - Prefilter Benchmark
+
+Times the analyzer with and without the keyword prefilter on a mostly
+clean synthetic log and checks that both produce identical results.
+
+Usage: python benchmarks/bench_prefilter.py [--lines N] [--dirty-ratio R]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.rules import load_rules
+from src.core.matcher import CompiledRuleSet
+from src.core.analyzer import analyze_log
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+CLEAN_LINES = [
+    "Oct 13 10:{m:02d}:{s:02d} server CRON[{p}]: (user) CMD (run-parts /etc/cron.hourly)",
+    "Oct 13 10:{m:02d}:{s:02d} server dhclient[{p}]: bound to 10.0.0.{p} -- renewal in 300 seconds.",
+    "Oct 13 10:{m:02d}:{s:02d} server kernel: [{p}.000] usb 1-1: new high-speed USB device number 4",
+    "Oct 13 10:{m:02d}:{s:02d} server postfix/qmgr[{p}]: 4F9D: removed",
+    "Oct 13 10:{m:02d}:{s:02d} server nginx: 10.1.1.{p} - - GET /index.html 200",
+]
+
+
+def build_log(path, lines, dirty_ratio):
+    """Write a synthetic log where only dirty_ratio of the lines are suspicious."""
+    with open(os.path.join(ROOT, 'sample.log'), 'r', encoding='utf-8') as f:
+        dirty_lines = [line.strip() for line in f if line.strip()]
+
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(lines):
+            if rng.random() < dirty_ratio:
+                f.write(rng.choice(dirty_lines) + '\n')
+            else:
+                line = rng.choice(CLEAN_LINES)
+                f.write(line.format(m=rng.randrange(60), s=rng.randrange(60), p=rng.randrange(1, 250)) + '\n')
+
+
+def timed(log_file, ruleset):
+    """Run the analyzer once and return (seconds, activities)."""
+    start = time.perf_counter()
+    activities = analyze_log(log_file, ruleset)
+    return time.perf_counter() - start, activities
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the rule prefilter')
+    parser.add_argument('--lines', type=int, default=20000, help='Number of log lines (default: 20000)')
+    parser.add_argument('--dirty-ratio', type=float, default=0.01,
+                        help='Fraction of suspicious lines (default: 0.01)')
+    parser.add_argument('-r', '--rules-file', default=os.path.join(ROOT, 'rules.json'))
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules_file)
+    if not rules:
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, 'bench.log')
+        build_log(log_file, args.lines, args.dirty_ratio)
+
+        baseline, expected = timed(log_file, CompiledRuleSet(rules, prefilter=False))
+        filtered, actual = timed(log_file, CompiledRuleSet(rules))
+
+    if actual != expected:
+        print("Error: prefilter results differ from the per-rule loop")
+        sys.exit(1)
+
+    print(f"{args.lines} lines, {len(rules)} rules, {len(expected)} activities")
+    print(f"  per-rule loop: {baseline:8.3f}s")
+    print(f"  prefilter:     {filtered:8.3f}s  ({baseline / filtered:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+EventSieve - Activity Module
+
+Compact records for suspicious activities found by the analyzer.
+"""
+
+from array import array
+
+from .parsers import parse_event
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+SEVERITY_CODES = {severity: code for code, severity in enumerate(SEVERITIES)}
+
+# Severity code stored for rules whose severity is not one of SEVERITIES
+UNKNOWN_SEVERITY = 255
+
+_FIELDS = ('line_number', 'line', 'rule', 'severity', 'pattern')
+
+
+class Activity:
+    """One rule match on one log line.
+
+    The rule description, severity and pattern are read from the compiled
+    rule instead of being copied, and every rule matched by the same line
+    shares its line string. Activities still behave like the dicts the
+    reports were written against, so activity['rule'] and
+    activity.get('source') keep working. captures holds the named groups
+    of the rule's pattern, taken from the match itself, or None.
+    """
+
+    __slots__ = ('line_number', 'line', 'compiled_rule', 'source', 'captures')
+
+    def __init__(self, line_number, line, compiled_rule, source=None, captures=None):
+        self.line_number = line_number
+        self.line = line
+        self.compiled_rule = compiled_rule
+        self.source = source
+        self.captures = captures
+
+    @property
+    def rule(self):
+        return self.compiled_rule.description
+
+    @property
+    def severity(self):
+        return self.compiled_rule.severity
+
+    @property
+    def pattern(self):
+        return self.compiled_rule.pattern
+
+    @property
+    def rule_index(self):
+        return self.compiled_rule.index
+
+    @property
+    def fields(self):
+        """The line's parsed event fields, overridden by the rule's captures."""
+        fields = dict(parse_event(self.line))
+        if self.captures:
+            fields.update(self.captures)
+        return fields
+
+    def keys(self):
+        """Return the record's field names, like dict.keys()."""
+        return _FIELDS + ('source',) if self.source else _FIELDS
+
+    def __getitem__(self, key):
+        if key in _FIELDS or key == 'source':
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key != 'source':
+            raise KeyError(key)
+        self.source = value
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        """Return a field value, or default when it is missing or empty."""
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def to_dict(self):
+        """Return the activity as a plain dict."""
+        return {key: self[key] for key in self.keys()}
+
+    def _key(self):
+        return (self.line_number, self.line, self.rule, self.severity, self.pattern, self.source)
+
+    def __eq__(self, other):
+        if isinstance(other, Activity):
+            return self._key() == other._key()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Activity(line_number={self.line_number!r}, rule={self.rule!r}, severity={self.severity!r})"
+
+
+class ActivityTable:
+    """Column store for a large number of activities.
+
+    Each activity costs a few bytes in typed arrays: its line number, an
+    index into the distinct matched lines, the id of its rule and a
+    severity code. The few activities with captures keep them in a dict
+    by row. Activity objects are only created while iterating.
+    """
+
+    def __init__(self, activities=(), rules=()):
+        self.line_numbers = array('L')
+        self.line_ids = array('L')
+        self.rule_ids = array('I')
+        self.severity_codes = array('B')
+        self.source_ids = None
+        self.captures = {}
+        self.lines = []
+        self.rules = []
+        self.sources = [None]
+        self._rule_ids = {}
+        self._source_ids = {None: 0}
+
+        # Registering a rule set up front makes rule ids equal rule indexes
+        for rule in rules:
+            self._rule_ids[rule] = len(self.rules)
+            self.rules.append(rule)
+
+        self.extend(activities)
+
+    @classmethod
+    def from_columns(cls, line_numbers, line_ids, rule_ids, lines, rules, captures=None):
+        """Rebuild a table from its columns, with rule ids indexing rules."""
+        table = cls(rules=rules)
+        table.line_numbers = line_numbers
+        table.line_ids = line_ids
+        table.rule_ids = rule_ids
+        table.lines = lines
+        table.captures = captures or {}
+        codes = [SEVERITY_CODES.get(rule.severity, UNKNOWN_SEVERITY) for rule in rules]
+        table.severity_codes = array('B', [codes[rule_id] for rule_id in rule_ids])
+        return table
+
+    def append(self, activity):
+        """Add one activity."""
+        self.add(activity.line_number, activity.line, activity.compiled_rule, activity.source,
+                 activity.captures)
+
+    def extend(self, activities):
+        """Add every activity of an iterable."""
+        for activity in activities:
+            self.add(activity.line_number, activity.line, activity.compiled_rule, activity.source,
+                     activity.captures)
+
+    def add(self, line_number, line, rule, source=None, captures=None):
+        """Add the match of a compiled rule on a line."""
+        rule_id = self._rule_ids.get(rule)
+        if rule_id is None:
+            rule_id = self._rule_ids[rule] = len(self.rules)
+            self.rules.append(rule)
+
+        # Rules matched by the same line arrive together; store the line once
+        if not self.lines or self.lines[-1] is not line:
+            self.lines.append(line)
+
+        self.line_numbers.append(line_number)
+        self.line_ids.append(len(self.lines) - 1)
+        self.rule_ids.append(rule_id)
+        self.severity_codes.append(SEVERITY_CODES.get(rule.severity, UNKNOWN_SEVERITY))
+
+        if captures:
+            self.captures[len(self.line_numbers) - 1] = captures
+        if source is not None or self.source_ids is not None:
+            self._add_source(source)
+
+    def _add_source(self, source):
+        """Record the source file of the activity just added."""
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+
+        if self.source_ids is None:
+            self.source_ids = array('L', bytes(array('L').itemsize * (len(self.line_numbers) - 1)))
+        self.source_ids.append(source_id)
+
+    def severity_counts(self):
+        """Return the number of activities per severity."""
+        return {severity: self.severity_codes.count(code) for code, severity in enumerate(SEVERITIES)}
+
+    def __len__(self):
+        return len(self.line_numbers)
+
+    def __bool__(self):
+        return len(self.line_numbers) > 0
+
+    def __eq__(self, other):
+        if isinstance(other, (ActivityTable, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        source = self.sources[self.source_ids[index]] if self.source_ids is not None else None
+        return Activity(self.line_numbers[index], self.lines[self.line_ids[index]],
+                        self.rules[self.rule_ids[index]], source, self.captures.get(index))
+
+    def __iter__(self):
+        lines, rules, sources, captures = self.lines, self.rules, self.sources, self.captures
+        source_ids = self.source_ids or ()
+        for i, (line_number, line_id, rule_id) in enumerate(zip(self.line_numbers, self.line_ids, self.rule_ids)):
+            source = sources[source_ids[i]] if source_ids else None
+            yield Activity(line_number, lines[line_id], rules[rule_id], source, captures.get(i))
@@ -0,0 +1,150 @@
+"""
+EventSieve - Aggregator Module
+
+Running statistics over suspicious activities for report summaries.
+"""
+
+import json
+from collections import Counter
+
+from .activity import SEVERITIES
+from .parsers import MONTHS, parse_event
+
+# Entries listed in the "top" tables of the reports
+TOP_COUNT = 10
+
+
+def _bucket_sort_key(label):
+    """Sort time buckets chronologically; syslog labels have no year."""
+    month = label[:3]
+    if month in MONTHS:
+        return (0, MONTHS.index(month), int(label[4:6]), label[7:])
+    return (1, label)
+
+
+def parse_timestamp(line):
+    """Return the (minute, hour) bucket labels of a log line, or None."""
+    time = parse_event(line).get('time')
+    if time is None:
+        return None
+    day, hour, minute, _ = time
+    return f"{day} {hour}:{minute}", f"{day} {hour}:00"
+
+
+class Aggregator:
+    """Per-severity, per-rule, per-source and per-time counters.
+
+    The analyzer feeds every activity through add() as it is found, so the
+    statistics are ready when analysis finishes and the reports can render
+    a summary without walking, or even keeping, the raw activities. Values
+    pulled from the line (timestamp, IPs, user) come from its parsed event,
+    once per line even when several rules match it.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.severity_counts = {severity: 0 for severity in SEVERITIES}
+        self.rule_counts = Counter()
+        self.ip_counts = Counter()
+        self.user_counts = Counter()
+        self.minute_counts = Counter()
+        self.hour_counts = Counter()
+        self._last_line = None
+        self._line_fields = None
+
+    def add(self, activity):
+        """Count one activity."""
+        self.total += 1
+        severity = activity['severity']
+        self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+        self.rule_counts[activity['rule']] += 1
+
+        line = activity['line']
+        if line is not self._last_line:
+            self._last_line = line
+            self._line_fields = self._extract(line)
+
+        buckets, ips, user = self._line_fields
+
+        # Addresses and users captured by the rule's named groups win
+        captures = getattr(activity, 'captures', None)
+        if captures:
+            if 'src_ip' in captures:
+                ips = (captures['src_ip'],)
+            user = captures.get('user', user)
+        if buckets:
+            self.minute_counts[buckets[0]] += 1
+            self.hour_counts[buckets[1]] += 1
+        for ip in ips:
+            self.ip_counts[ip] += 1
+        if user:
+            self.user_counts[user] += 1
+
+    def extend(self, activities):
+        """Count every activity of an iterable."""
+        for activity in activities:
+            self.add(activity)
+
+    def watch(self, activities):
+        """Count activities while passing them on unchanged."""
+        for activity in activities:
+            self.add(activity)
+            yield activity
+
+    @staticmethod
+    def _extract(line):
+        """Return (time buckets, IPv4 addresses, user name) found in a line."""
+        event = parse_event(line)
+        return parse_timestamp(line), event.get('addresses', ()), event.get('user')
+
+    def top_rules(self, count=TOP_COUNT):
+        return self.rule_counts.most_common(count)
+
+    def top_ips(self, count=TOP_COUNT):
+        return self.ip_counts.most_common(count)
+
+    def top_users(self, count=TOP_COUNT):
+        return self.user_counts.most_common(count)
+
+    def busiest_minutes(self, count=TOP_COUNT):
+        return self.minute_counts.most_common(count)
+
+    def timeline(self):
+        """Return (hour, count) pairs in chronological order."""
+        return sorted(self.hour_counts.items(), key=lambda item: _bucket_sort_key(item[0]))
+
+    def to_dict(self):
+        """Return the counters as JSON-serializable data."""
+        return {
+            'total': self.total,
+            'severity_counts': dict(self.severity_counts),
+            'rule_counts': dict(self.rule_counts),
+            'ip_counts': dict(self.ip_counts),
+            'user_counts': dict(self.user_counts),
+            'minute_counts': dict(self.minute_counts),
+            'hour_counts': dict(self.hour_counts)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild an aggregator from to_dict() output."""
+        aggregator = cls()
+        aggregator.total = data.get('total', 0)
+        aggregator.severity_counts.update(data.get('severity_counts', {}))
+        aggregator.rule_counts.update(data.get('rule_counts', {}))
+        aggregator.ip_counts.update(data.get('ip_counts', {}))
+        aggregator.user_counts.update(data.get('user_counts', {}))
+        aggregator.minute_counts.update(data.get('minute_counts', {}))
+        aggregator.hour_counts.update(data.get('hour_counts', {}))
+        return aggregator
+
+    def save(self, path):
+        """Write the counters to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Read counters written by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
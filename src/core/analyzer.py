@@ -4,39 +4,390 @@ EventSieve - Analyzer Module
 Core log analysis functionality using regex patterns.
 """
 
-import re
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from colorama import Fore, Style
 
+from .activity import Activity, ActivityTable
+from .compression import detect_compression, open_log
+from .correlator import Correlator
+from .matcher import CompiledRuleSet, compile_rules
 
-def analyze_log(log_file, rules):
-    """Analyze the log file and return suspicious activities."""
-    suspicious_activities = []
+# Byte ranges handed to each worker process
+MIN_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Bytes read at a time when scanning for line breaks
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Bytes of a memory-mapped log scanned at a time, extended to a newline
+MMAP_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Rule set compiled once in every worker process
+_worker_ruleset = None
+
+
+def _build_activities(line_num, line, matched, captures=None):
+    """Turn the rules matched by a line into activity records."""
+    if captures:
+        return [Activity(line_num, line, rule, captures=captures.get(rule.index)) for rule in matched]
+    return [Activity(line_num, line, rule) for rule in matched]
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw binary stream over the bytes [start, end) of a file."""
+
+    def __init__(self, log_file, start, end):
+        self._file = open(log_file, 'rb', buffering=0)
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        count = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= count
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class _CountingLines:
+    """Iterate over lines while counting them."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self.count = 0
+
+    def __iter__(self):
+        for line in self._lines:
+            self.count += 1
+            yield line
+
+
+def _open_range(log_file, start, end):
+    """Open a byte range of the log file as text, split like open(..., 'r')."""
+    return io.TextIOWrapper(io.BufferedReader(_RangeReader(log_file, start, end)), encoding='utf-8')
+
+
+def _analyze_serial(log_file, ruleset, start=0, end=None, first_line=1):
+    """Analyze the log file, or a byte range of it, line by line in this process."""
+    if start == 0 and end is None:
+        f = open_log(log_file)
+    else:
+        f = _open_range(log_file, start, end)
+
+    with f:
+        for line_num, line, matched, captures in ruleset.match_many(f, first_line):
+            yield from _build_activities(line_num, line, matched, captures)
+
+
+def _analyze_mmap(log_file, ruleset, start=0, end=None, first_line=1):
+    """Analyze an uncompressed log file, or a byte range of it, in memory-mapped blocks."""
+    with open(log_file, 'rb') as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        if end <= start:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            while start < end:
+                block_end = mapped.find(b'\n', min(start + MMAP_BLOCK_SIZE, end) - 1, end)
+                block_end = end if block_end < 0 else block_end + 1
+                block = mapped[start:block_end]
+
+                for line_num, line, matched, captures in ruleset.match_block(block, first_line):
+                    yield from _build_activities(line_num, line, matched, captures)
+
+                first_line += block.count(b'\n') + block.count(b'\r') - block.count(b'\r\n')
+                start = block_end
+
+
+def _chunk_ranges(log_file, workers, start=0, end=None):
+    """Split a file, or a byte range of it, into newline-aligned (start, end) ranges."""
+    if end is None:
+        end = os.path.getsize(log_file)
+    chunk_size = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, (end - start) // (workers * 4) + 1))
+
+    ranges = []
+    with open(log_file, 'rb') as f:
+        while start < end:
+            f.seek(min(start + chunk_size, end))
+            f.readline()
+            chunk_end = min(f.tell(), end)
+            ranges.append((start, chunk_end))
+            start = chunk_end
+
+    return ranges
+
+
+def _init_worker(rules, timeout=None):
+    """Compile the rules once per worker process."""
+    global _worker_ruleset
+    _worker_ruleset = CompiledRuleSet(rules, timeout=timeout)
+
+
+def _analyze_chunk(log_file, start, end):
+    """Analyze one byte range, or a whole file when start is None.
+
+    Returns (line_count, matches, quarantined). Line numbers in matches are
+    relative to the start of the range, and rules in matches and in
+    quarantined, the rules this worker has quarantined so far, are
+    referenced by their index in the compiled rule set.
+    """
+    with open_log(log_file) if start is None else _open_range(log_file, start, end) as f:
+        lines = _CountingLines(f)
+        matches = [(line_num, line, [rule.index for rule in matched], captures)
+                   for line_num, line, matched, captures in _worker_ruleset.match_many(lines)]
+
+    return lines.count, matches, [rule.index for rule in _worker_ruleset.quarantined]
+
+
+def _file_tasks(log_file, workers, start=0, end=None):
+    """Return the (log_file, start, end) tasks that analyze a file in the pool.
+
+    Compressed files cannot be split and are decompressed by one worker.
+    """
+    if detect_compression(log_file):
+        return [(log_file, None, None)]
+    return [(log_file, chunk_start, chunk_end)
+            for chunk_start, chunk_end in _chunk_ranges(log_file, workers, start, end)]
+
+
+def _analyze_tasks(tasks, ruleset, workers, first_line=1):
+    """Run analysis tasks in a process pool and yield their activities in order.
+
+    Each result carries the line count of its task, so line numbers continue
+    across tasks, and across files when tasks span several files. Rules a
+    worker quarantined are quarantined in ruleset as well.
+    """
+    compiled = ruleset.compiled
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(ruleset.rules, ruleset.timeout)) as executor:
+        results = executor.map(_analyze_chunk, *zip(*tasks))
+
+        # Results arrive in task order; shift relative line numbers by the
+        # lines in all previous tasks.
+        line_offset = first_line - 1
+        for (log_file, _, _), (line_count, matches, quarantined) in zip(tasks, results):
+            for index in quarantined:
+                ruleset.quarantine(compiled[index], report=False)
+            for line_num, line, indices, captures in matches:
+                for activity in _build_activities(line_offset + line_num, line,
+                                                  [compiled[i] for i in indices], captures):
+                    yield log_file, activity
+            line_offset += line_count
+
+
+def _analyze_log_parallel(log_file, ruleset, workers, start=0, end=None, first_line=1):
+    """Analyze byte ranges of the log file in a process pool."""
+    tasks = _file_tasks(log_file, workers, start, end)
+    if len(tasks) < 2:
+        yield from _analyze_serial(log_file, ruleset, start, end, first_line)
+        return
+
+    for _, activity in _analyze_tasks(tasks, ruleset, workers, first_line):
+        yield activity
+
+
+def _analyze_range(log_file, ruleset, workers, start=0, end=None, first_line=1, use_mmap=False):
+    """Yield the activities of a byte range, numbering lines from first_line.
+
+    With use_mmap a serial analysis of an uncompressed file scans
+    memory-mapped blocks instead of reading line by line.
+    """
+    if workers > 1:
+        return _analyze_log_parallel(log_file, ruleset, workers, start, end, first_line)
+    if use_mmap and (end is not None or not detect_compression(log_file)):
+        return _analyze_mmap(log_file, ruleset, start, end, first_line)
+    return _analyze_serial(log_file, ruleset, start, end, first_line)
+
+
+def _check_mmap(ruleset, use_mmap):
+    """Return whether the memory-mapped scan can be used with the rule set."""
+    if use_mmap and not ruleset.block_scan:
+        print(f"{Fore.YELLOW}Warning: Some rules have no fixed text to scan for; "
+              f"reading the log line by line instead of memory-mapped.{Style.RESET_ALL}")
+        return False
+    return use_mmap
+
+
+def _count_lines(log_file, start, end):
+    """Count the lines in a byte range the way open(..., 'r') splits them."""
+    count = 0
+    carriage_return = False
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+
+            # \r\n counts once, lone \r and \n count as line breaks
+            count += block.count(b'\n') + block.count(b'\r') - block.count(b'\r\n')
+            if carriage_return and block.startswith(b'\n'):
+                count -= 1
+            carriage_return = block.endswith(b'\r')
+    return count
+
+
+def _complete_end(log_file, start, end):
+    """Return the offset just past the last newline in [start, end), or start."""
+    with open(log_file, 'rb') as f:
+        position = end
+        while position > start:
+            block_start = max(start, position - READ_BLOCK_SIZE)
+            f.seek(block_start)
+            index = f.read(position - block_start).rfind(b'\n')
+            if index >= 0:
+                return block_start + index + 1
+            position = block_start
+    return start
+
+
+def _analyze_cached(log_file, ruleset, workers, cache, use_mmap=False):
+    """Analyze only the bytes appended since the cached run, then update the cache.
+
+    The cache covers complete lines only: a trailing line without a newline
+    is analyzed on every run until it is finished.
+    """
+    # Compressed archives are read as a whole and not cached
+    if detect_compression(log_file):
+        return ActivityTable(_analyze_serial(log_file, ruleset))
+
+    stat = os.stat(log_file)
+    size = stat.st_size
+
+    cached = cache.load(log_file, ruleset, stat)
+    if cached is not None:
+        table, offset, line_count = cached
+        print(f"{Fore.CYAN}Reusing cached results for {line_count} lines, "
+              f"analyzing {size - offset} new bytes.{Style.RESET_ALL}")
+    else:
+        table, offset, line_count = ActivityTable(rules=ruleset.compiled), 0, 0
+
+    complete = _complete_end(log_file, offset, size)
+    if complete > offset:
+        table.extend(_analyze_range(log_file, ruleset, workers, offset, complete, line_count + 1, use_mmap))
+        line_count += _count_lines(log_file, offset, complete)
+
+    # Results missing the matches of a quarantined rule are not cached
+    if not ruleset.quarantined:
+        cache.store(log_file, ruleset, stat, complete, line_count, table)
+
+    if complete < size:
+        table.extend(_analyze_range(log_file, ruleset, 1, complete, size, line_count + 1, use_mmap))
+    return table
+
+
+def iter_activities(log_file, rules, workers=1, aggregator=None, use_mmap=False):
+    """Yield suspicious activities one at a time, in file order.
+
+    Unlike analyze_log nothing is accumulated, so memory use does not grow
+    with the number of matches. An Aggregator passed in is updated with
+    every activity on the way. use_mmap selects the memory-mapped block
+    scan for serial analysis of uncompressed files.
+    """
+    ruleset = compile_rules(rules)
+    use_mmap = _check_mmap(ruleset, use_mmap)
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    try:
+        activities = _analyze_range(log_file, ruleset, workers, use_mmap=use_mmap)
+        if ruleset.has_thresholds:
+            activities = Correlator().watch(activities)
+        if aggregator is not None:
+            activities = aggregator.watch(activities)
+        yield from activities
+
+    except FileNotFoundError:
+        print(f"{Fore.RED}Error: Log file not found: {log_file}{Style.RESET_ALL}")
+        raise
+    except Exception as e:
+        print(f"{Fore.RED}Error: Error reading log file: {e}{Style.RESET_ALL}")
+        raise
+
+
+def _analyze_files_serial(log_files, ruleset):
+    """Yield (log_file, activity) for several files read one after the other."""
+    line_offset = 0
+    for log_file in log_files:
+        with open_log(log_file) as f:
+            lines = _CountingLines(f)
+            for line_num, line, matched, captures in ruleset.match_many(lines, line_offset + 1):
+                for activity in _build_activities(line_num, line, matched, captures):
+                    yield log_file, activity
+        line_offset += lines.count
+
+
+def iter_log_files(log_files, rules, workers=1, aggregator=None):
+    """Yield the activities of several files as one continuous log.
+
+    Files are read in the given order, e.g. oldest rotated archive first,
+    line numbers continue from one file to the next and every activity
+    names its file as source. With several workers all files share one
+    process pool: plain files are split into chunks and each compressed
+    file is decompressed by its own worker.
+    """
+    ruleset = compile_rules(rules)
+
+    if workers <= 0:
+        workers = os.cpu_count() or 1
 
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-
-                for rule in rules:
-                    pattern = rule.get('pattern', '')
-                    description = rule.get('description', 'Unknown rule')
-                    severity = rule.get('severity', 'low')
-
-                    try:
-                        if re.search(pattern, line, re.IGNORECASE):
-                            suspicious_activities.append({
-                                'line_number': line_num,
-                                'line': line,
-                                'rule': description,
-                                'severity': severity,
-                                'pattern': pattern
-                            })
-                    except re.error as e:
-                        print(f"{Fore.YELLOW}Warning: Invalid regex pattern '{pattern}': {e}{Style.RESET_ALL}")
+        if workers > 1:
+            tasks = [task for log_file in log_files for task in _file_tasks(log_file, workers)]
+            activities = _analyze_tasks(tasks, ruleset, workers) if tasks else ()
+        else:
+            activities = _analyze_files_serial(log_files, ruleset)
 
+        correlator = Correlator() if ruleset.has_thresholds else None
+        for log_file, activity in activities:
+            activity.source = log_file
+            if correlator is not None and not correlator.admit(activity):
+                continue
+            if aggregator is not None:
+                aggregator.add(activity)
+            yield activity
+
+    except FileNotFoundError as e:
+        print(f"{Fore.RED}Error: Log file not found: {e.filename}{Style.RESET_ALL}")
+        raise
+    except Exception as e:
+        print(f"{Fore.RED}Error: Error reading log file: {e}{Style.RESET_ALL}")
+        raise
+
+
+def analyze_log(log_file, rules, workers=1, aggregator=None, cache=None, use_mmap=False):
+    """Analyze the log file and return suspicious activities as an ActivityTable.
+
+    With an AnalysisCache only the part of the file appended since the
+    previous run is analyzed. The cache holds the raw rule matches, and
+    threshold rules are correlated afresh over the cached and new matches.
+    """
+    ruleset = compile_rules(rules)
+    if cache is None:
+        return ActivityTable(iter_activities(log_file, ruleset, workers, aggregator, use_mmap))
+
+    use_mmap = _check_mmap(ruleset, use_mmap)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    try:
+        activities = _analyze_cached(log_file, ruleset, workers, cache, use_mmap)
     except FileNotFoundError:
         print(f"{Fore.RED}Error: Log file not found: {log_file}{Style.RESET_ALL}")
         raise
@@ -44,29 +395,18 @@ def analyze_log(log_file, rules):
         print(f"{Fore.RED}Error: Error reading log file: {e}{Style.RESET_ALL}")
         raise
 
-    return suspicious_activities
+    if ruleset.has_thresholds:
+        activities = ActivityTable(Correlator().watch(activities), rules=ruleset.compiled)
+    if aggregator is not None:
+        aggregator.extend(activities)
+    return activities
 
 
 def analyze_log_line(line, line_num, rules):
     """Analyze a single log line and return matching activities."""
-    activities = []
+    ruleset = compile_rules(rules)
     line = line.strip()
 
-    for rule in rules:
-        pattern = rule.get('pattern', '')
-        description = rule.get('description', 'Unknown rule')
-        severity = rule.get('severity', 'low')
-
-        try:
-            if re.search(pattern, line, re.IGNORECASE):
-                activities.append({
-                    'line_number': line_num,
-                    'line': line,
-                    'rule': description,
-                    'severity': severity,
-                    'pattern': pattern
-                })
-        except re.error as e:
-            print(f"{Fore.YELLOW}Warning: Invalid regex pattern '{pattern}': {e}{Style.RESET_ALL}")
-
-    return activities
\ No newline at end of file
+    captures = {}
+    matched = ruleset.match(line, captures)
+    return _build_activities(line_num, line, matched, captures)
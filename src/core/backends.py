@@ -0,0 +1,141 @@
+"""
+EventSieve - Watch Backends Module
+
+Wake-up strategies for watch mode: inotify on Linux, polling elsewhere.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from colorama import Fore, Style
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# Re-check files at least this often even when no event arrives, in case
+# the filesystem does not deliver inotify events (e.g. network mounts)
+INOTIFY_SAFETY_TIMEOUT = 30.0
+
+BACKENDS = ('auto', 'inotify', 'poll')
+
+
+class PollingBackend:
+    """Re-check the watched files every interval seconds."""
+
+    name = 'poll'
+
+    def __init__(self, interval):
+        self.timeout = interval
+
+    def add(self, path):
+        """Register a file to watch (nothing to do when polling)."""
+
+    def fileno(self):
+        """Polling has no descriptor to wait on."""
+        return None
+
+    def close(self):
+        """Release backend resources."""
+
+
+class InotifyBackend:
+    """Wake up on inotify events for the watched files (Linux only).
+
+    The parent directory of each file is watched rather than the file itself,
+    so creation and renames of the file are seen as well.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, interval):
+        if not sys.platform.startswith('linux'):
+            raise OSError('inotify is only available on Linux')
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self.timeout = max(interval, INOTIFY_SAFETY_TIMEOUT)
+        self._paths = {}
+
+    def add(self, path):
+        """Watch the directory containing path for events on that file."""
+        path = os.path.abspath(path)
+        directory, name = os.path.split(path)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), directory)
+
+        self._paths[(wd, os.fsencode(name))] = path
+
+    def fileno(self):
+        return self.fd
+
+    def drain(self):
+        """Consume pending events and return {absolute path: event mask} of changed files.
+
+        The masks of several events on one file are combined, so a caller
+        can tell whether a writer has finished (IN_CLOSE_WRITE, IN_MOVED_TO).
+        """
+        changed = {}
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            if not data:
+                return changed
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                # Events were dropped: every file may have changed
+                if mask & IN_Q_OVERFLOW:
+                    for path in self._paths.values():
+                        changed[path] = changed.get(path, 0) | IN_Q_OVERFLOW
+                elif (wd, name) in self._paths:
+                    path = self._paths[(wd, name)]
+                    changed[path] = changed.get(path, 0) | mask
+
+    def close(self):
+        """Release the inotify descriptor."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_backend(name, interval):
+    """Return a watch backend, falling back to polling when inotify is unavailable."""
+    if name in ('auto', 'inotify'):
+        try:
+            return InotifyBackend(interval)
+        except (OSError, AttributeError) as e:
+            if name == 'inotify':
+                print(f"{Fore.YELLOW}Warning: inotify unavailable ({e}), falling back to polling.{Style.RESET_ALL}")
+
+    return PollingBackend(interval)
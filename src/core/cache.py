@@ -0,0 +1,123 @@
+"""
+EventSieve - Analysis Cache Module
+
+On-disk cache of analysis results so a re-run only analyzes appended data.
+"""
+
+import hashlib
+import json
+import os
+from array import array
+from colorama import Fore, Style
+
+from .activity import ActivityTable
+from .tailer import FINGERPRINT_SIZE
+
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                 'eventsieve')
+
+# Entries hold matched log lines, so only the owner may read them
+CACHE_DIR_MODE = 0o700
+CACHE_FILE_MODE = 0o600
+
+# Column arrays stored in a cache entry, in file order
+_COLUMNS = ('line_numbers', 'line_ids', 'rule_ids')
+
+
+def rules_hash(ruleset):
+    """Return a digest identifying the rules a result set was produced with."""
+    data = json.dumps(ruleset.rules, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _fingerprint(log_file, size):
+    """Return the first bytes of the log file, up to size."""
+    with open(log_file, 'rb') as f:
+        return f.read(min(FINGERPRINT_SIZE, size))
+
+
+class AnalysisCache:
+    """Results of previous runs, one entry per log file path.
+
+    An entry is valid for the same file (device and inode), the same rules
+    and the same leading bytes, and records the byte offset and line count
+    up to which the file was analyzed. It is stored as a JSON header line,
+    a JSON list of the matched lines, a JSON object of the captures by row
+    and the raw activity table columns.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+
+    def _entry_path(self, log_file):
+        digest = hashlib.sha1(os.path.abspath(log_file).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.cache")
+
+    def load(self, log_file, ruleset, stat):
+        """Return (table, offset, line_count) cached for the file, or None."""
+        try:
+            with open(self._entry_path(log_file), 'rb') as f:
+                header = json.loads(f.readline())
+                if (header.get('version') != CACHE_VERSION
+                        or header.get('path') != os.path.abspath(log_file)
+                        or header.get('device') != stat.st_dev
+                        or header.get('inode') != stat.st_ino
+                        or header.get('rules') != rules_hash(ruleset)
+                        or header.get('offset', 0) > stat.st_size
+                        or bytes.fromhex(header.get('fingerprint', '')) !=
+                        _fingerprint(log_file, header.get('offset', 0))):
+                    return None
+
+                lines = json.loads(f.readline())
+                captures = {int(row): fields for row, fields in json.loads(f.readline()).items()}
+                columns = []
+                for name in _COLUMNS:
+                    column = array(header['typecodes'][name])
+                    column.fromfile(f, header['activities'])
+                    columns.append(column)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            print(f"{Fore.YELLOW}Warning: Ignoring unreadable cache entry for {log_file}: {e}{Style.RESET_ALL}")
+            return None
+
+        table = ActivityTable.from_columns(*columns, lines, ruleset.compiled, captures)
+        return table, header['offset'], header['line_count']
+
+    def store(self, log_file, ruleset, stat, offset, line_count, table):
+        """Save the results for the first offset bytes of the file.
+
+        The table's rule ids must be indexes into ruleset.compiled, i.e. it
+        was created with ActivityTable(rules=ruleset.compiled).
+        """
+        header = {
+            'version': CACHE_VERSION,
+            'path': os.path.abspath(log_file),
+            'device': stat.st_dev,
+            'inode': stat.st_ino,
+            'rules': rules_hash(ruleset),
+            'offset': offset,
+            'line_count': line_count,
+            'fingerprint': _fingerprint(log_file, offset).hex(),
+            'activities': len(table),
+            'typecodes': {name: getattr(table, name).typecode for name in _COLUMNS}
+        }
+
+        # Write then rename so an interrupted run never leaves a broken entry
+        entry_path = self._entry_path(log_file)
+        temp_file = f"{entry_path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, mode=CACHE_DIR_MODE, exist_ok=True)
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, CACHE_FILE_MODE)
+            os.fchmod(fd, CACHE_FILE_MODE)
+            with open(fd, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                f.write(json.dumps(table.lines).encode('utf-8') + b'\n')
+                f.write(json.dumps(table.captures).encode('utf-8') + b'\n')
+                for name in _COLUMNS:
+                    getattr(table, name).tofile(f)
+            os.replace(temp_file, entry_path)
+        except OSError as e:
+            print(f"{Fore.YELLOW}Warning: Could not write analysis cache: {e}{Style.RESET_ALL}")
@@ -0,0 +1,47 @@
+"""
+EventSieve - Compression Module
+
+Transparent reading of gzip, bzip2 and xz compressed log files.
+"""
+
+import bz2
+import gzip
+import lzma
+
+# Leading bytes identifying each supported compression format
+MAGIC_NUMBERS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bzip2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+)
+
+_OPENERS = {
+    'gzip': gzip.open,
+    'bzip2': bz2.open,
+    'xz': lzma.open,
+}
+
+
+def detect_compression(log_file):
+    """Return 'gzip', 'bzip2' or 'xz' from the file's magic bytes, or None."""
+    with open(log_file, 'rb') as f:
+        head = f.read(6)
+
+    for magic, name in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_log(log_file, compression=None):
+    """Open a log file as UTF-8 text, decompressing it on the fly if needed.
+
+    Lines are split the same way as open(log_file, 'r') would split the
+    uncompressed data. Multi-member gzip files are read to the end.
+    """
+    if compression is None:
+        compression = detect_compression(log_file)
+
+    if compression is None:
+        return open(log_file, 'r', encoding='utf-8')
+    return _OPENERS[compression](log_file, 'rt', encoding='utf-8')
@@ -0,0 +1,160 @@
+"""
+EventSieve - Correlator Module
+
+Threshold rules: N matches sharing a key within a sliding time window.
+"""
+
+import calendar
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+from .parsers import MONTHS, parse_event
+
+# Keys tracked at once across all threshold rules; the least recently
+# updated key is dropped beyond this
+MAX_KEYS = 1000000
+
+# group_by values computed from the line rather than from a named regex group
+BUILTIN_KEYS = ('ip', 'user', 'source')
+
+# Nominal first year for syslog timestamps, which carry none
+_SYSLOG_YEAR = 2000
+
+# A syslog timestamp this far behind the previous one means the log
+# crossed New Year
+YEAR_ROLLOVER = 180 * 24 * 3600
+
+
+def parse_time(line, year=_SYSLOG_YEAR):
+    """Return the leading timestamp of a log line in seconds, or None.
+
+    Syslog timestamps have no year and are placed in the given one.
+    """
+    time = parse_event(line).get('time')
+    if time is None:
+        return None
+
+    date, hour, minute, second = time
+    try:
+        if date[:3] in MONTHS:
+            return calendar.timegm((year, MONTHS.index(date[:3]) + 1, int(date[4:]),
+                                    int(hour), int(minute), int(second)))
+        if date[0].isdigit():
+            return calendar.timegm(datetime.fromisoformat(f"{date} {hour}:{minute}:{second}").timetuple())
+    except ValueError:
+        pass
+    return None
+
+
+def group_key(rule, activity):
+    """Return the value a threshold rule groups the activity by, or None."""
+    group_by = rule.group_by
+    if group_by is None:
+        return ''
+
+    if group_by == 'source':
+        return activity.source or ''
+    if group_by == 'ip':
+        addresses = parse_event(activity.line).get('addresses')
+        return addresses[0] if addresses else None
+    if group_by == 'user':
+        return parse_event(activity.line).get('user')
+
+    return activity.captures.get(group_by) if activity.captures else None
+
+
+def is_threshold_rule(rule):
+    """Return True for a raw rule with a threshold, i.e. a correlation rule."""
+    return rule.get('threshold') is not None
+
+
+class Correlator:
+    """Sliding-window state for the threshold rules of a rule set.
+
+    Every match of a threshold rule records its time under (rule, key).
+    Only the last threshold times are kept per key, in a small array used
+    as a ring buffer: when it is full and spans at most window_seconds the
+    rule fires on the current line and the key starts over. Keys are kept
+    in update order so the ones idle for longer than their window are
+    dropped from the front, and at most max_keys are tracked at once.
+    Syslog timestamps move on to the next year when they jump back by
+    more than half a year, e.g. from Dec 31 to Jan 1.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS):
+        self.max_keys = max_keys
+        self.alerts = 0
+        self.evictions = 0
+        self._windows = OrderedDict()
+        self._longest_window = 0
+        self._last_time = None
+        self._year = _SYSLOG_YEAR
+
+    def __len__(self):
+        return len(self._windows)
+
+    def add(self, activity):
+        """Record a match of a threshold rule; return True when the rule fires."""
+        rule = activity.compiled_rule
+        now = parse_time(activity.line, self._year)
+        if now is not None and self._last_time is not None and now < self._last_time - YEAR_ROLLOVER:
+            rolled = parse_time(activity.line, self._year + 1)
+            if rolled is not None and rolled != now:
+                self._year += 1
+                now = rolled
+        if now is None:
+            # Continuation lines without a timestamp belong to the last one
+            now = self._last_time
+            if now is None:
+                return False
+        self._last_time = now
+
+        key = group_key(rule, activity)
+        if key is None:
+            return False
+
+        self._longest_window = max(self._longest_window, rule.window_seconds)
+        self._expire(now)
+
+        windows = self._windows
+        window_key = (rule.index, key)
+        times = windows.get(window_key)
+        if times is None:
+            if len(windows) >= self.max_keys:
+                windows.popitem(last=False)
+                self.evictions += 1
+            times = windows[window_key] = array('d')
+        else:
+            windows.move_to_end(window_key)
+
+        times.append(now)
+        if len(times) > rule.threshold:
+            del times[0]
+        if len(times) == rule.threshold and 0 <= now - times[0] <= rule.window_seconds:
+            del windows[window_key]
+            self.alerts += 1
+            return True
+        return False
+
+    def _expire(self, now):
+        """Drop keys not updated within the longest window."""
+        windows = self._windows
+        horizon = now - self._longest_window
+        while windows:
+            times = next(iter(windows.values()))
+            if times[-1] >= horizon:
+                break
+            windows.popitem(last=False)
+
+    def admit(self, activity):
+        """Return True for a plain activity or a threshold rule that fires."""
+        if activity.compiled_rule.threshold is None:
+            return True
+        return self.add(activity)
+
+    def watch(self, activities):
+        """Pass plain activities on and turn threshold rule matches into alerts."""
+        for activity in activities:
+            if self.admit(activity):
+                yield activity
@@ -0,0 +1,483 @@
+"""
+EventSieve - Matcher Module
+
+Compiled rule engine shared by the batch analyzer and the watcher.
+"""
+
+import re
+import signal
+from colorama import Fore, Style
+
+from .parsers import log_type_of, parse_event, program_of, typed_fields
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Seconds a rule may spend searching one line before it is quarantined
+DEFAULT_RULE_TIMEOUT = 1.0
+
+# Programs whose routed rule subset is remembered; others are routed per line
+MAX_ROUTES = 4096
+
+# Any byte outside ASCII, used to find lines the block scan must not prefilter
+_NON_ASCII = re.compile(rb'[^\x00-\x7f]')
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+_BRANCH = sre_parse.BRANCH
+_ASSERTS = (sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+_MAXREPEAT = sre_parse.MAXREPEAT
+_REPEATS = tuple(op for op in (getattr(sre_parse, name, None) for name in
+                               ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')) if op is not None)
+
+
+def _score(literals):
+    """Rank a literal set: longer shortest literal and fewer alternatives win."""
+    return (min(len(lit) for lit in literals), -len(literals))
+
+
+def _required_literals(parsed):
+    """Return lowercase literals one of which every match must contain.
+
+    Returns None when the pattern can match without any fixed ASCII text,
+    in which case the rule can never be skipped by the prefilter.
+    """
+    candidates = []
+    run = []
+
+    def flush():
+        if run:
+            candidates.append({''.join(run)})
+            run.clear()
+
+    for op, av in parsed:
+        if op is _LITERAL and av < 128:
+            run.append(chr(av).lower())
+            continue
+
+        flush()
+        required = None
+        if op is _SUBPATTERN:
+            required = _required_literals(av[-1])
+        elif op is _BRANCH:
+            branches = [_required_literals(branch) for branch in av[1]]
+            if all(branches):
+                required = set().union(*branches)
+        elif op in _REPEATS and av[0] >= 1:
+            required = _required_literals(av[2])
+
+        if required:
+            candidates.append(required)
+    flush()
+
+    if not candidates:
+        return None
+    return max(candidates, key=_score)
+
+
+def _prune_literals(literals):
+    """Drop literals that contain another literal of the set."""
+    pruned = []
+    for lit in sorted(literals, key=len):
+        if not any(shorter in lit for shorter in pruned):
+            pruned.append(lit)
+    return pruned
+
+
+def _nested_repeat(parsed, unbounded=False):
+    """Return True if a repeat sits inside an unbounded repeat of parsed."""
+    for op, av in parsed:
+        if op in _REPEATS:
+            if unbounded and av[1] > 1:
+                return True
+            if _nested_repeat(av[2], unbounded or av[1] == _MAXREPEAT):
+                return True
+        elif op is _SUBPATTERN:
+            if _nested_repeat(av[-1], unbounded):
+                return True
+        elif op is _BRANCH:
+            if any(_nested_repeat(branch, unbounded) for branch in av[1]):
+                return True
+        elif op in _ASSERTS:
+            if _nested_repeat(av[1], unbounded):
+                return True
+    return False
+
+
+def has_nested_quantifier(pattern):
+    """Return True if the pattern repeats a repeat, like (a+)+ or (\\w+\\s?)*.
+
+    Such patterns can backtrack exponentially on lines that almost match.
+    """
+    try:
+        return _nested_repeat(sre_parse.parse(pattern, re.IGNORECASE))
+    except Exception:
+        return False
+
+
+class RuleTimeout(Exception):
+    """Raised inside a regex search that ran out of its time budget."""
+
+
+def _raise_timeout(signum, frame):
+    raise RuleTimeout()
+
+
+def _install_alarm():
+    """Install the SIGALRM handler used for rule timeouts.
+
+    Returns False where interval timers are unavailable (Windows) or when
+    called outside the main thread, which is the only one receiving signals.
+    """
+    if not hasattr(signal, 'setitimer'):
+        return False
+    try:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    except ValueError:
+        return False
+    return True
+
+
+def _no_match(line):
+    """Search function of a quarantined rule."""
+    return None
+
+
+def _line_end(block, position):
+    """Return the offset of the newline ending the line at position."""
+    end = block.find(b'\n', position)
+    return len(block) if end < 0 else end
+
+
+class CompiledRule:
+    """A single rule with its pattern compiled once."""
+
+    __slots__ = ('index', 'pattern', 'description', 'severity', 'regex', 'literals',
+                 'threshold', 'window_seconds', 'group_by', 'field', 'captures', 'applies_to')
+
+    def __init__(self, index, rule, regex):
+        self.index = index
+        self.pattern = rule.get('pattern', '')
+        self.description = rule.get('description', 'Unknown rule')
+        self.severity = rule.get('severity', 'low')
+        self.regex = regex
+
+        # Threshold rules only fire on repeated matches, see correlator.py
+        self.threshold = rule.get('threshold')
+        self.window_seconds = rule.get('window_seconds')
+        self.group_by = rule.get('group_by')
+
+        # A rule with a field matches that field of the parsed event instead
+        # of the whole line; named groups of its pattern become captures
+        self.field = rule.get('field')
+        self.captures = tuple(regex.groupindex)
+
+        # Program names or log types the rule is limited to, lowercased
+        applies_to = rule.get('applies_to')
+        if isinstance(applies_to, str):
+            applies_to = [applies_to]
+        self.applies_to = frozenset(name.lower() for name in applies_to) if applies_to else None
+
+        # Field values such as format or time need not appear in the line
+        # as written, so field rules are never prefiltered on it
+        try:
+            literals = None if self.field else _required_literals(sre_parse.parse(self.pattern, re.IGNORECASE))
+        except Exception:
+            literals = None
+        self.literals = tuple(_prune_literals(literals)) if literals else None
+
+    def target(self, line):
+        """Return the text the pattern is matched against, or None if the line lacks the field."""
+        if self.field is None:
+            return line
+        value = parse_event(line).get(self.field)
+        return None if value is None else str(value)
+
+    def search(self, line):
+        """Search the rule's pattern in a line, or in its field."""
+        text = self.target(line)
+        return self.regex.search(text) if text is not None else None
+
+
+
+class CompiledRuleSet:
+    """Rules compiled once and matched against log lines."""
+
+    def __init__(self, rules, prefilter=True, timeout=None):
+        # rules.py imports this module for its pattern checks
+        from .rules import threshold_error
+
+        self.rules = []
+        self.compiled = []
+        self.invalid = []
+
+        for rule in rules:
+            pattern = rule.get('pattern', '')
+            try:
+                regex = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                print(f"{Fore.YELLOW}Warning: Invalid regex pattern '{pattern}': {e}{Style.RESET_ALL}")
+                self.invalid.append(rule)
+                continue
+
+            error = threshold_error(rule) if rule.get('threshold') is not None else None
+            if error:
+                print(f"{Fore.YELLOW}Warning: Skipped threshold rule '{rule.get('description', pattern)}': "
+                      f"{error}{Style.RESET_ALL}")
+                self.invalid.append(rule)
+                continue
+
+            self.compiled.append(CompiledRule(len(self.compiled), rule, regex))
+            self.rules.append(rule)
+
+        # Bound search methods keep the per-line loop free of attribute lookups
+        self._searches = [(rule.regex.search if rule.field is None else rule.search, rule)
+                          for rule in self.compiled]
+
+        # With a timeout every search runs under an interval timer, and a rule
+        # that exceeds it is quarantined for the rest of the run
+        self.timeout = timeout
+        self.quarantined = []
+        if timeout:
+            if _install_alarm():
+                self._searches = [(self._guarded_search(search, rule), rule) for search, rule in self._searches]
+            else:
+                print(f"{Fore.YELLOW}Warning: Rule timeouts need SIGALRM in the main thread; "
+                      f"rules run without a time budget.{Style.RESET_ALL}")
+                self.timeout = None
+
+        # Keyword prefilter: a rule is only searched when the line contains
+        # one of its required literals, and when every rule has literals a
+        # line containing none of them skips the rule loop entirely.
+        self.prefilter = prefilter
+        self._gated = [(rule.literals, search, rule) for search, rule in self._searches]
+        self._keywords = None
+        if all(rule.literals for rule in self.compiled):
+            self._keywords = tuple(_prune_literals(
+                {lit for rule in self.compiled for lit in rule.literals}))
+
+        # Block scan: rule indexes per literal, searched for in whole blocks.
+        # A literal containing a line break can never occur inside a line.
+        self._block_literals = None
+        if self._keywords is not None:
+            literal_rules = {}
+            for rule in self.compiled:
+                for literal in rule.literals:
+                    if '\n' not in literal and '\r' not in literal:
+                        literal_rules.setdefault(literal.encode('ascii'), []).append(rule.index)
+            self._block_literals = list(literal_rules.items())
+
+        # Rule routing: a rule with applies_to is only searched on lines whose
+        # syslog program (or the program before a '/', as in postfix/smtpd),
+        # or that program's log type, it names. Lines without a program tag
+        # still face every rule.
+        self._routed = any(rule.applies_to for rule in self.compiled)
+        self._routes = {}
+
+    def __len__(self):
+        return len(self.compiled)
+
+    @property
+    def has_thresholds(self):
+        """True when some rules are threshold rules needing a Correlator."""
+        return any(rule.threshold is not None for rule in self.compiled)
+
+    def _guarded_search(self, search, rule):
+        """Return search wrapped to give up after self.timeout seconds."""
+        timeout = self.timeout
+
+        def guarded_search(line):
+            try:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+                try:
+                    return search(line)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except RuleTimeout:
+                self.quarantine(rule, line)
+                return None
+
+        return guarded_search
+
+    def quarantine(self, rule, line=None, report=True):
+        """Stop searching a rule for the rest of the run and report it.
+
+        report=False records a rule already reported, e.g. by a worker process.
+        """
+        if rule in self.quarantined:
+            return
+        self.quarantined.append(rule)
+
+        if report:
+            message = f"Warning: Rule '{rule.description}' exceeded its {self.timeout}s time budget"
+            if line is not None:
+                message += f" on line: {line[:80]}"
+            print(f"{Fore.YELLOW}{message}\nThe rule is disabled for the rest of the run: "
+                  f"{rule.pattern}{Style.RESET_ALL}")
+
+        self._searches = [(_no_match if quarantined is rule else search, quarantined)
+                          for search, quarantined in self._searches]
+        self._gated = [(literals, _no_match if quarantined is rule else search, quarantined)
+                       for literals, search, quarantined in self._gated]
+        self._routes.clear()
+
+    def _route(self, line):
+        """Return (gated, searches, indexes) of the rules applying to a line.
+
+        For a line without a program tag that is every rule, with indexes None.
+        """
+        program = program_of(line)
+        if program is None:
+            return self._gated, self._searches, None
+
+        route = self._routes.get(program)
+        if route is None:
+            # A sub-program tag such as postfix/smtpd also names its program
+            names = {program, program.split('/', 1)[0]}
+            log_type = log_type_of(program)
+            if log_type:
+                names.add(log_type.lower())
+            indexes = frozenset(rule.index for rule in self.compiled
+                                if rule.applies_to is None or not rule.applies_to.isdisjoint(names))
+            route = ([entry for entry in self._gated if entry[2].index in indexes],
+                     [entry for entry in self._searches if entry[1].index in indexes],
+                     indexes)
+            if len(self._routes) < MAX_ROUTES:
+                self._routes[program] = route
+        return route
+
+    @property
+    def block_scan(self):
+        """True when match_block can be used, i.e. every rule has literals."""
+        return self.prefilter and self._block_literals is not None
+
+    def match(self, line, captures=None):
+        """Return the compiled rules matching a stripped log line.
+
+        When a captures dict is given, the typed named groups of every
+        matching rule that has some are stored in it under the rule index.
+        """
+        # Case-insensitive matching of non-ASCII text does not agree with
+        # str.lower(), so those lines always take the full rule loop.
+        if not self.prefilter or not line.isascii():
+            searches = self._route(line)[1] if self._routed else self._searches
+            return _matching(searches, line, captures)
+
+        lowered = line.lower()
+        if self._keywords is not None:
+            for keyword in self._keywords:
+                if keyword in lowered:
+                    break
+            else:
+                return []
+
+        matched = []
+        gated = self._route(line)[0] if self._routed else self._gated
+        for literals, search, rule in gated:
+            if literals is not None:
+                for literal in literals:
+                    if literal in lowered:
+                        break
+                else:
+                    continue
+
+            found = search(line)
+            if found:
+                matched.append(rule)
+                if rule.captures and captures is not None:
+                    captures[rule.index] = typed_fields(found.groupdict())
+        return matched
+
+    def match_many(self, lines, start=1):
+        """Yield (line_number, line, matched_rules, captures) for every matching line.
+
+        captures maps rule indexes to named groups, or is None when no
+        matching rule has any.
+        """
+        match = self.match
+        for line_num, line in enumerate(lines, start):
+            line = line.strip()
+            if not line:
+                continue
+
+            captures = {}
+            matched = match(line, captures)
+            if matched:
+                yield line_num, line, matched, captures or None
+
+    def match_block(self, block, first_line=1):
+        """Yield (line_number, line, matched_rules, captures) for the matching lines of a block.
+
+        The block holds whole lines of UTF-8 encoded text. Rather than
+        decoding every line, the rule literals are searched for in the
+        lowercased block and only the lines containing one, or containing
+        non-ASCII bytes, are decoded (invalid bytes replaced), stripped and
+        matched. Lines are split like open(..., 'r') splits them. Requires
+        block_scan.
+        """
+        # Lines break at \r, \n and \r\n; turn every break into one \n
+        if b'\r' in block:
+            block = block.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+        lowered = block.lower()
+        find, rfind = lowered.find, lowered.rfind
+
+        # Line start offset -> indexes of the rules whose literals it contains
+        candidates = {}
+        for literal, rule_indexes in self._block_literals:
+            position = find(literal)
+            while position >= 0:
+                start = rfind(b'\n', 0, position) + 1
+                candidates.setdefault(start, []).extend(rule_indexes)
+                position = find(literal, position + len(literal))
+
+        # Lines with non-ASCII text go through the full rule loop
+        if not block.isascii():
+            match = _NON_ASCII.search(block)
+            while match:
+                position = match.start()
+                start = block.rfind(b'\n', 0, position) + 1
+                candidates.setdefault(start, [])
+                match = _NON_ASCII.search(block, _line_end(block, position))
+
+        searches = self._searches
+        line_num = first_line
+        counted = 0
+        for start in sorted(candidates):
+            line_num += block.count(b'\n', counted, start)
+            counted = start
+
+            line = block[start:_line_end(block, start)].decode('utf-8', 'replace').strip()
+            captures = {}
+            if not line.isascii():
+                matched = self.match(line, captures)
+            else:
+                indexes = set(candidates[start])
+                if self._routed:
+                    allowed = self._route(line)[2]
+                    if allowed is not None:
+                        indexes &= allowed
+                matched = _matching([searches[index] for index in sorted(indexes)], line, captures)
+            if matched:
+                yield line_num, line, matched, captures or None
+
+
+def _matching(searches, line, captures):
+    """Return the rules of (search, rule) pairs matching a line, storing captures."""
+    matched = []
+    for search, rule in searches:
+        found = search(line)
+        if found:
+            matched.append(rule)
+            if rule.captures and captures is not None:
+                captures[rule.index] = typed_fields(found.groupdict())
+    return matched
+
+
+def compile_rules(rules):
+    """Return a CompiledRuleSet, compiling raw rules if necessary."""
+    if isinstance(rules, CompiledRuleSet):
+        return rules
+    return CompiledRuleSet(rules)
@@ -0,0 +1,134 @@
+"""
+EventSieve - Parsers Module
+
+Structured events parsed from syslog, nginx combined and apache error lines.
+"""
+
+import re
+
+# Leading timestamp of a log line: syslog ("Oct 13 10:15:01") or ISO 8601
+SYSLOG_TIMESTAMP = re.compile(r'([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})')
+ISO_TIMESTAMP = re.compile(r'(\d{4}-\d{2}-\d{2})[T ](\d{2}):(\d{2}):(\d{2})')
+
+IPV4_ADDRESS = re.compile(r'(?<![\d.])(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)(?![\d.])')
+USER_NAME = re.compile(r'\b(?:invalid user\s+|for user\s+|user=|logname=|sudo: +)([\w.@-]+)|\bfor ([\w.@-]+) from',
+                       re.IGNORECASE)
+
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+SYSLOG = re.compile(
+    r'(?P<timestamp>[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}|\d{4}-\d{2}-\d{2}T\S+) '
+    r'(?P<host>\S+) (?P<program>[^\s\[:]+)(?:\[(?P<pid>\d+)\])?: (?P<message>.*)')
+
+NGINX_COMBINED = re.compile(
+    r'(?P<client>\S+) \S+ (?P<remote_user>\S+) \[(?P<timestamp>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)(?: (?P<protocol>[^"]*))?" (?P<status>\d{3}) (?P<bytes>\d+|-)'
+    r'(?: "(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)")?')
+
+APACHE_ERROR = re.compile(
+    r'\[(?P<timestamp>[^\]]+)\] \[(?:(?P<module>\w+):)?(?P<level>\w+)\]'
+    r'(?: \[pid (?P<pid>\d+)(?::tid \d+)?\])?(?: \[client (?P<client>[^\]]+)\])? (?P<message>.*)')
+
+# Log types, as scan_system_logs names them, of common syslog programs
+PROGRAM_LOG_TYPES = {
+    'sshd': 'Authentication',
+    'sudo': 'Authentication',
+    'su': 'Authentication',
+    'login': 'Authentication',
+    'systemd-logind': 'Authentication',
+    'kernel': 'Kernel',
+    'apache2': 'Apache Web Server',
+    'httpd': 'Apache Web Server',
+    'nginx': 'Nginx Web Server',
+    'mysqld': 'MySQL Database',
+    'mariadbd': 'MySQL Database',
+    'postgres': 'PostgreSQL Database',
+    'postfix': 'Mail Server',
+    'dovecot': 'Mail Server',
+    'sendmail': 'Mail Server',
+    'exim': 'Mail Server',
+    'cron': 'Cron Jobs',
+    'crond': 'Cron Jobs',
+    'anacron': 'Cron Jobs',
+}
+
+# Formats tried in order; each regex is anchored at the line start
+FORMATS = (
+    ('syslog', SYSLOG),
+    ('nginx', NGINX_COMBINED),
+    ('apache_error', APACHE_ERROR),
+)
+
+# Fields, in parsed events and rule capture groups, converted to int
+INT_FIELDS = frozenset(('pid', 'port', 'status', 'bytes', 'uid', 'gid'))
+
+# Last line parsed, as one tuple so readers on other threads see a
+# consistent (line, event) pair
+_last = (None, {})
+
+
+def typed_fields(groups):
+    """Return matched groups without empty ones, with INT_FIELDS as int."""
+    fields = {}
+    for name, value in groups.items():
+        if value is None or value == '-':
+            continue
+        if name in INT_FIELDS and value.isdigit():
+            value = int(value)
+        fields[name] = value
+    return fields
+
+
+def program_of(line):
+    """Return the lowercased syslog program tag of a line, or None."""
+    program = parse_event(line).get('program')
+    return program.lower() if program else None
+
+
+def log_type_of(program):
+    """Return the log type of a syslog program, e.g. 'postfix/smtpd', or None."""
+    return PROGRAM_LOG_TYPES.get(program.split('/', 1)[0])
+
+
+def parse_event(line):
+    """Return the fields of a log line as a dict.
+
+    Lines of a known format get its fields and a 'format' key. Every line
+    also gets the values the reports and threshold rules need: 'time', the
+    leading timestamp as (date, hour, minute, second) strings, 'addresses',
+    its distinct IPv4 addresses in order, and 'user', a user name found in
+    the text. The activities of one line all ask for its event, so the
+    most recent result is remembered and a line is parsed only once.
+    """
+    global _last
+    last_line, event = _last
+    if line is last_line or line == last_line:
+        return event
+
+    event = {}
+    for name, regex in FORMATS:
+        match = regex.match(line)
+        if match:
+            event = typed_fields(match.groupdict())
+            event['format'] = name
+            break
+
+    match = SYSLOG_TIMESTAMP.match(line)
+    if match:
+        month, day, hour, minute, second = match.groups()
+        event['time'] = (f"{month} {int(day):2d}", hour, minute, second)
+    else:
+        match = ISO_TIMESTAMP.match(line)
+        if match:
+            event['time'] = match.groups()
+
+    addresses = tuple(dict.fromkeys(IPV4_ADDRESS.findall(line)))
+    if addresses:
+        event['addresses'] = addresses
+
+    match = USER_NAME.search(line)
+    if match:
+        event['user'] = match.group(1) or match.group(2)
+
+    _last = (line, event)
+    return event
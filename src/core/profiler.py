@@ -0,0 +1,129 @@
+"""
+EventSieve - Rule Profiler Module
+
+Per-rule timing of regex searches to find rules that are slow or backtrack.
+"""
+
+import json
+from time import perf_counter
+from colorama import Fore, Style
+
+from .matcher import CompiledRuleSet
+
+# Rules listed in the printed profile table
+PROFILE_TOP = 20
+
+# A single search slower than this marks the rule as pathological
+PATHOLOGICAL_TIME = 0.01
+
+# Characters of the worst-case line shown in the table
+LINE_PREVIEW = 60
+
+
+class RuleStats:
+    """Search counters of one rule."""
+
+    __slots__ = ('calls', 'hits', 'total_time', 'worst_time', 'worst_line')
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.total_time = 0.0
+        self.worst_time = 0.0
+        self.worst_line = None
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ProfilingRuleSet(CompiledRuleSet):
+    """A rule set that times every regex search it runs.
+
+    Matching behaves exactly like CompiledRuleSet, prefilter included, so
+    call counts show how often each rule really gets searched. The timing
+    wraps the search functions only and adds a small constant cost per
+    search.
+    """
+
+    def __init__(self, rules, prefilter=True, timeout=None):
+        super().__init__(rules, prefilter, timeout)
+        self.stats = [RuleStats() for _ in self.compiled]
+
+        self._searches = [(self._timed_search(search, rule), rule) for search, rule in self._searches]
+        self._gated = [(rule.literals, search, rule) for search, rule in self._searches]
+
+    def _timed_search(self, search, rule):
+        """Return a rule's search function wrapped to update its stats."""
+        stats = self.stats[rule.index]
+
+        def timed_search(line):
+            start = perf_counter()
+            match = search(line)
+            elapsed = perf_counter() - start
+
+            stats.calls += 1
+            stats.total_time += elapsed
+            if match:
+                stats.hits += 1
+            if elapsed > stats.worst_time:
+                stats.worst_time = elapsed
+                stats.worst_line = line
+            return match
+
+        return timed_search
+
+    def ranked(self):
+        """Return (rule, stats) pairs of searched rules, slowest total first."""
+        pairs = [(rule, stats) for rule, stats in zip(self.compiled, self.stats) if stats.calls]
+        return sorted(pairs, key=lambda pair: pair[1].total_time, reverse=True)
+
+    def pathological(self):
+        """Return the rules with a single search slower than PATHOLOGICAL_TIME."""
+        return [rule for rule, stats in self.ranked() if stats.worst_time >= PATHOLOGICAL_TIME]
+
+    def to_dict(self):
+        """Return the profile as JSON-serializable data, slowest rule first."""
+        return {
+            'total_time': sum(stats.total_time for stats in self.stats),
+            'pathological_time': PATHOLOGICAL_TIME,
+            'rules': [dict(index=rule.index, rule=rule.description, pattern=rule.pattern,
+                           severity=rule.severity, **stats.to_dict())
+                      for rule, stats in self.ranked()]
+        }
+
+    def save(self, path):
+        """Write the profile to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+def print_profile(ruleset, top=PROFILE_TOP):
+    """Print the slowest rules of a ProfilingRuleSet as a ranked table."""
+    ranked = ruleset.ranked()
+    total_time = sum(stats.total_time for _, stats in ranked)
+
+    print(f"\nRule profile: {len(ranked)} of {len(ruleset)} rules searched, "
+          f"{total_time:.3f}s in regex search")
+    if not ranked:
+        return
+
+    print(f"{'#':>3}  {'total ms':>9}  {'share':>6}  {'calls':>9}  {'hits':>7}  "
+          f"{'avg us':>7}  {'worst us':>9}  rule")
+    for rank, (rule, stats) in enumerate(ranked[:top], 1):
+        share = stats.total_time / total_time * 100 if total_time else 0.0
+        average = stats.total_time / stats.calls * 1e6
+        print(f"{rank:>3}  {stats.total_time * 1e3:>9.2f}  {share:>5.1f}%  {stats.calls:>9}  {stats.hits:>7}  "
+              f"{average:>7.1f}  {stats.worst_time * 1e6:>9.1f}  {rule.description}")
+        print(f"{'':>5}pattern: {rule.pattern}")
+        worst_line = stats.worst_line
+        if len(worst_line) > LINE_PREVIEW:
+            worst_line = worst_line[:LINE_PREVIEW] + '...'
+        print(f"{'':>5}worst line: {worst_line}")
+
+    if len(ranked) > top:
+        print(f"... {len(ranked) - top} more rules")
+
+    for rule in ruleset.pathological():
+        print(f"{Fore.YELLOW}Warning: Rule '{rule.description}' took "
+              f"{ruleset.stats[rule.index].worst_time * 1e3:.1f} ms on a single line; "
+              f"its pattern may backtrack: {rule.pattern}{Style.RESET_ALL}")
@@ -5,9 +5,13 @@ Handles loading and validation of JSON rule files.
 """
 
 import json
+import re
 from pathlib import Path
 from colorama import Fore, Style
 
+from .correlator import BUILTIN_KEYS, is_threshold_rule
+from .matcher import has_nested_quantifier
+
 
 def load_rules(rules_file):
     """Load the rules file."""
@@ -45,4 +49,50 @@ def validate_rules(rules):
             print(f"{Fore.RED}Error: Rule {i+1} has invalid severity: {rule['severity']}{Style.RESET_ALL}")
             return False
 
-    return True
\ No newline at end of file
+        if 'field' in rule and not isinstance(rule['field'], str):
+            print(f"{Fore.RED}Error: Rule {i+1} field must be the name of a parsed event field{Style.RESET_ALL}")
+            return False
+
+        applies_to = rule.get('applies_to', [])
+        if isinstance(applies_to, str):
+            applies_to = [applies_to]
+        if not isinstance(applies_to, list) or not all(isinstance(name, str) for name in applies_to):
+            print(f"{Fore.RED}Error: Rule {i+1} applies_to must be a program name, a log type "
+                  f"or a list of them{Style.RESET_ALL}")
+            return False
+
+        if is_threshold_rule(rule):
+            error = threshold_error(rule)
+            if error:
+                print(f"{Fore.RED}Error: Rule {i+1} {error}{Style.RESET_ALL}")
+                return False
+
+        # Nested quantifiers are allowed but can backtrack catastrophically
+        if has_nested_quantifier(rule['pattern']):
+            print(f"{Fore.YELLOW}Warning: Rule {i+1} has nested quantifiers and may backtrack "
+                  f"heavily: {rule['pattern']}{Style.RESET_ALL}")
+
+    return True
+
+
+def threshold_error(rule):
+    """Return what is wrong with the threshold fields of a threshold rule, or None."""
+    threshold = rule.get('threshold')
+    if isinstance(threshold, bool) or not isinstance(threshold, int) or threshold < 1:
+        return "threshold must be a positive integer"
+
+    window = rule.get('window_seconds')
+    if isinstance(window, bool) or not isinstance(window, (int, float)) or window <= 0:
+        return "window_seconds must be a positive number"
+
+    group_by = rule.get('group_by')
+    if group_by is not None and group_by not in BUILTIN_KEYS:
+        try:
+            groups = re.compile(rule.get('pattern', '')).groupindex
+        except re.error:
+            groups = {}
+        if group_by not in groups:
+            return (f"group_by must be one of {', '.join(BUILTIN_KEYS)} "
+                    f"or a named group of its pattern: {group_by}")
+
+    return None
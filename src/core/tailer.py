@@ -0,0 +1,278 @@
+"""
+EventSieve - Tailer Module
+
+Incremental, rotation-aware reading of growing log files for watch mode.
+"""
+
+import json
+import os
+import re
+from colorama import Fore, Style
+
+# Bytes read per system call while catching up on appended data
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Leading bytes of the file used to recognise it after copytruncate
+FINGERPRINT_SIZE = 256
+
+# Line breaks as the batch analyzer's text-mode reads see them
+_LINE_BREAK = re.compile(rb'\r\n|\r|\n')
+
+
+class LogTailer:
+    """Follow a growing log file and hand out new complete lines.
+
+    The byte position and the running line count advance together, so each
+    poll only costs the bytes appended since the previous one. The open file
+    is identified by (st_dev, st_ino): when logrotate renames it away, the
+    old file is drained to EOF before the new one is followed. The position
+    can be persisted to a small state file so a restart resumes where the
+    previous run stopped.
+    """
+
+    def __init__(self, log_file, state_file=None):
+        self.log_file = log_file
+        self.state_file = state_file
+        self.position = 0
+        self.line_count = 0
+        self.rewinds = 0
+        self.rotations = 0
+        self.pending = False
+        self.missing = False
+        self.identity = None
+        self._file = None
+        self._fingerprint = b''
+        self._last_size = None
+        self._split_break = False
+        self._saved_state = None
+        self._resume = self._load_state() if state_file else None
+
+    def reset(self):
+        """Start again from the beginning of the current file."""
+        self.position = 0
+        self.line_count = 0
+        self.pending = False
+        self._fingerprint = b''
+        self._last_size = None
+        self._split_break = False
+
+    def close(self):
+        """Close the followed file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self, path):
+        """Open path from its beginning; return False if it does not exist."""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return False
+
+        self.close()
+        stat = os.fstat(f.fileno())
+        self._file = f
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.reset()
+        return True
+
+    def _head(self, size):
+        """Return the first size bytes of the followed file."""
+        self._file.seek(0)
+        return self._file.read(size)
+
+    def read_lines(self):
+        """Yield (line_number, line) for every line appended since the last call.
+
+        Lines end at \r\n, \r or \n, as in the batch analyzer, so line
+        numbers agree with it. A trailing line without a newline is held
+        back while the file is still growing and handed out once the size
+        stays unchanged for a poll or the file has been rotated away.
+        """
+        self.pending = False
+
+        if self._resume is not None:
+            state, self._resume = self._resume, None
+            self._resume_from(state)
+
+        if self._file is None and not self._open(self.log_file):
+            self.missing = True
+            return
+
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            stat = None
+        self.missing = stat is None
+
+        if stat is None or (stat.st_dev, stat.st_ino) != self.identity:
+            # Rotated away or deleted: finish the old file first
+            yield from self._read_available(final=True)
+            if stat is None or not self._open(self.log_file):
+                return
+            self.rotations += 1
+
+        yield from self._read_available()
+
+    def _read_available(self, final=False):
+        """Yield the complete lines between the position and the end of the open file."""
+        size = os.fstat(self._file.fileno()).st_size
+
+        # Truncated, or truncated and already rewritten past our position
+        # (copytruncate): the leading bytes no longer match what was read
+        if size < self.position or (self._fingerprint and
+                                    self._head(len(self._fingerprint)) != self._fingerprint):
+            self.reset()
+            self.rewinds += 1
+
+        stalled = final or size == self._last_size
+        self._last_size = size
+        if size == self.position:
+            return
+
+        self._file.seek(self.position)
+        pending = b''
+        remaining = size - self.position
+
+        # The \n of a \r\n whose \r already ended a held-back line
+        if self._split_break:
+            self._split_break = False
+            if self._file.read(1) == b'\n':
+                self.position += 1
+                remaining -= 1
+            else:
+                self._file.seek(self.position)
+
+        while remaining > 0:
+            chunk = self._file.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+            data = pending + chunk
+            if b'\r' not in data:
+                *lines, pending = data.split(b'\n')
+                for raw in lines:
+                    self.position += len(raw) + 1
+                    self.line_count += 1
+                    line = raw.decode('utf-8', errors='replace').strip()
+                    if line:
+                        yield self.line_count, line
+                continue
+
+            start = 0
+            for match in _LINE_BREAK.finditer(data):
+                # A \r ending the data may be the first half of a \r\n
+                if match.end() == len(data) and match.group() == b'\r':
+                    break
+                self.position += match.end() - start
+                self.line_count += 1
+                line = data[start:match.start()].decode('utf-8', errors='replace').strip()
+                start = match.end()
+                if line:
+                    yield self.line_count, line
+            pending = data[start:]
+
+        if pending and stalled:
+            self.position += len(pending)
+            self.line_count += 1
+            self._split_break = pending.endswith(b'\r')
+            line = pending.decode('utf-8', errors='replace').strip()
+            if line:
+                yield self.line_count, line
+        elif pending:
+            self.pending = True
+
+        if len(self._fingerprint) < FINGERPRINT_SIZE and self.position > len(self._fingerprint):
+            self._fingerprint = self._head(min(FINGERPRINT_SIZE, self.position))
+
+    def _resume_from(self, state):
+        """Reopen the file recorded in the state file at its saved position."""
+        identity = (state.get('device'), state.get('inode'))
+
+        path = self.log_file
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+
+        if stat is None or (stat.st_dev, stat.st_ino) != identity:
+            # Rotated while we were stopped: resume in the renamed file so
+            # its tail is drained before following the new one
+            path = self._find_rotated(identity)
+            if path is None:
+                return
+
+        if not self._open(path) or self.identity != identity:
+            self.close()
+            return
+
+        fingerprint = bytes.fromhex(state.get('fingerprint', ''))
+        size = os.fstat(self._file.fileno()).st_size
+        if size < state.get('position', 0) or self._head(len(fingerprint)) != fingerprint:
+            # Different content under the same inode: start over
+            return
+
+        self.position = state.get('position', 0)
+        self.line_count = state.get('line_count', 0)
+        self._fingerprint = fingerprint
+
+    def _find_rotated(self, identity):
+        """Return the path of a sibling file with the given identity, if any."""
+        directory, name = os.path.split(os.path.abspath(self.log_file))
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return None
+
+        for entry in entries:
+            if not entry.name.startswith(name) or entry.name == name:
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if (stat.st_dev, stat.st_ino) == identity:
+                return entry.path
+        return None
+
+    def _load_state(self):
+        """Read the saved position for this log file from the state file."""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"{Fore.YELLOW}Warning: Could not read state file {self.state_file}: {e}{Style.RESET_ALL}")
+            return None
+
+        if state.get('path') != os.path.abspath(self.log_file):
+            return None
+        return state
+
+    def save_state(self):
+        """Persist the current position to the state file if it changed."""
+        if not self.state_file or self.identity is None:
+            return
+
+        state = {
+            'path': os.path.abspath(self.log_file),
+            'device': self.identity[0],
+            'inode': self.identity[1],
+            'position': self.position,
+            'line_count': self.line_count,
+            'fingerprint': self._fingerprint.hex()
+        }
+        if state == self._saved_state:
+            return
+
+        # Write then rename so a crash never leaves a half-written state file
+        temp_file = f"{self.state_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_file, self.state_file)
+            self._saved_state = state
+        except OSError as e:
+            print(f"{Fore.YELLOW}Warning: Could not write state file {self.state_file}: {e}{Style.RESET_ALL}")
@@ -4,144 +4,500 @@ EventSieve - Watcher Module
 Real-time log file monitoring functionality.
 """
 
+import asyncio
+import hashlib
+import os
+import re
 import time
-from pathlib import Path
+from collections import Counter, OrderedDict, deque
 from datetime import datetime
 from colorama import Fore, Back, Style
 
 from .analyzer import analyze_log_line
-from ..reports.html_report import generate_html_report
+from .backends import IN_CLOSE_WRITE, IN_MOVED_TO, PollingBackend, create_backend
+from .correlator import Correlator
+from .matcher import CompiledRuleSet
+from .parsers import IPV4_ADDRESS, ISO_TIMESTAMP, SYSLOG_TIMESTAMP
+from .rules import load_rules, validate_rules
+from .tailer import LogTailer
+from ..reports.html_report import HTML_PAGE_SIZE, BackgroundRenderer, generate_html_report
+
+# Most recent activities kept in memory for live HTML report refreshes
+REPORT_MAX_ACTIVITIES = 5000
+
+# Alerts remembered for de-duplication, and seconds a repeat stays suppressed
+DEDUP_MAX_SIZE = 10000
+DEDUP_TTL = 60.0
+
+# Seconds an edit of the rules file must stay unchanged before it is loaded,
+# unless the writer is known to be done, so a save in progress is never parsed
+RULES_SETTLE_TIME = 0.5
+
+# Runs of digits (PIDs, ports, counters) ignored when comparing alerts; IPv4
+# addresses are matched first so alerts about different hosts stay apart
+_NUMBERS = re.compile(f"({IPV4_ADDRESS.pattern})|\\d+")
+
+
+def _collapse_number(match):
+    return match.group(1) or '#'
+
+
+def normalize_line(line):
+    """Return a line without its timestamp and with digit runs, except IPv4 addresses, collapsed."""
+    match = SYSLOG_TIMESTAMP.match(line) or ISO_TIMESTAMP.match(line)
+    if match:
+        line = line[match.end():]
+    return _NUMBERS.sub(_collapse_number, line)
+
+
+class AlertDeduplicator:
+    """Bounded index of recently shown alerts keyed on (rule, normalized line).
+
+    An alert is shown once and its repeats are suppressed for ttl seconds.
+    Entries are kept in the order they were shown, so expired ones are
+    dropped from the front and the oldest is evicted when the index is
+    full; every check is O(1) amortized. A size or ttl of 0 shows every
+    alert. Threshold rule alerts are always shown: the correlator already
+    reports each burst once.
+    """
+
+    def __init__(self, max_size=DEDUP_MAX_SIZE, ttl=DEDUP_TTL, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.suppressed = 0
+        self.suppressed_by_rule = Counter()
+        self.evictions = 0
+        self._shown = OrderedDict()
+
+    def __len__(self):
+        return len(self._shown)
+
+    def admit(self, activity):
+        """Return True if the alert should be shown, False if it is a repeat."""
+        if not self.max_size or not self.ttl or activity.compiled_rule.threshold is not None:
+            return True
+
+        now = self.clock()
+        shown = self._shown
+        while shown and next(iter(shown.values())) <= now - self.ttl:
+            shown.popitem(last=False)
+
+        key = (activity['rule'], normalize_line(activity['line']))
+        if key in shown:
+            self.suppressed += 1
+            self.suppressed_by_rule[activity['rule']] += 1
+            return False
+
+        if len(shown) >= self.max_size:
+            shown.popitem(last=False)
+            self.evictions += 1
+        shown[key] = now
+        return True
+
+
+class RulesReloader:
+    """Recompiles the rules file when it changes on disk.
+
+    The file's modification time, size and inode are compared on every
+    check, which costs one stat call. A new signature is only loaded once
+    two checks RULES_SETTLE_TIME apart have seen it unchanged, or right
+    away when the writer has closed or renamed the file, so a save still
+    in progress is neither parsed nor reported. An edit that does not load,
+    validate or compile completely keeps the previous rule set.
+    """
+
+    def __init__(self, rules_file, timeout=None, clock=time.monotonic):
+        self.rules_file = rules_file
+        self.timeout = timeout
+        self.clock = clock
+        self.reloads = 0
+        self._signature = self._stat()
+        self._pending = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.rules_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def check(self, written=False):
+        """Return a new CompiledRuleSet if the rules file changed and is valid, else None.
+
+        written=True means the writer is done, e.g. on inotify's IN_CLOSE_WRITE.
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            self._pending = None
+            return None
+
+        # Wait until the file stops changing
+        if not written:
+            now = self.clock()
+            if self._pending is None or self._pending[0] != signature:
+                self._pending = (signature, now)
+                return None
+            if now - self._pending[1] < RULES_SETTLE_TIME:
+                return None
+        self._pending = None
+        self._signature = signature
+
+        rules = load_rules(self.rules_file)
+        if not rules or not validate_rules(rules):
+            print(f"{Fore.YELLOW}Warning: Rules file changed but is invalid; "
+                  f"keeping the previous rules.{Style.RESET_ALL}")
+            return None
+
+        ruleset = CompiledRuleSet(rules, timeout=self.timeout)
+        if ruleset.invalid:
+            print(f"{Fore.YELLOW}Warning: Rules file changed but {len(ruleset.invalid)} patterns do not "
+                  f"compile; keeping the previous rules.{Style.RESET_ALL}")
+            return None
+
+        self.reloads += 1
+        return ruleset
+
+
+class ReportAggregate:
+    """Running activity totals for refreshing the HTML report in watch mode.
+
+    Severity counts cover every activity seen, while only the most recent
+    activities are kept for rendering so memory stays bounded. Both are
+    kept per source file, so clearing one file keeps the others.
+    """
+
+    def __init__(self, max_activities=REPORT_MAX_ACTIVITIES):
+        self._recent = deque(maxlen=max_activities)
+        self._counts = {}
+
+    @property
+    def activities(self):
+        return [activity for _, activity in self._recent]
+
+    @property
+    def severity_counts(self):
+        totals = Counter({'low': 0, 'medium': 0, 'high': 0, 'critical': 0})
+        for counts in self._counts.values():
+            totals.update(counts)
+        return dict(totals)
+
+    @property
+    def total(self):
+        return sum(sum(counts.values()) for counts in self._counts.values())
+
+    def clear(self, source=None):
+        """Forget one source, e.g. after its file was truncated, or every source."""
+        if source is None:
+            self._recent.clear()
+            self._counts.clear()
+            return
+
+        self._counts.pop(source, None)
+        kept = [entry for entry in self._recent if entry[0] != source]
+        self._recent.clear()
+        self._recent.extend(kept)
+
+    def add(self, activities, source=None):
+        """Fold new activities of one source into the running totals."""
+        counts = self._counts.setdefault(source, Counter())
+        for activity in activities:
+            self._recent.append((source, activity))
+            counts[activity['severity']] += 1
+
+
+class WatchSession:
+    """State shared by every file watched from one process."""
+
+    def __init__(self, ruleset, rules_file, html_output_file, report_label, report_limit, tag_sources,
+                 template_dir=None, dedup=None, reloader=None):
+        self.ruleset = ruleset
+        self.rules_file = rules_file
+        self.html_output_file = html_output_file
+        self.report_label = report_label
+        self.template_dir = template_dir
+        self.renderer = BackgroundRenderer() if html_output_file else None
+        self.report = ReportAggregate(report_limit)
+        self.tag_sources = tag_sources
+        self.dedup = dedup if dedup is not None else AlertDeduplicator()
+        self.correlator = Correlator() if ruleset.has_thresholds else None
+        self.reloader = reloader
+        self._rewinds = {}
+        self._rotations = {}
+
+    def process(self, tailer):
+        """Analyze the lines appended to one file and report new activities."""
+        source = tailer.log_file
+        suppressed = self.dedup.suppressed
+
+        # Pick up an edited rules file before reading, never in the middle
+        self.reload_rules()
+
+        # Read lines appended since the last check
+        new_activities = []
+        report_changed = False
+        for line_num, line in tailer.read_lines():
+            # Truncated file: the report restarts with its new content
+            if tailer.rewinds != self._rewinds.get(source, 0):
+                self._rewinds[source] = tailer.rewinds
+                self.report.clear(source)
+                report_changed = True
+
+            # Analyze the line
+            activities = analyze_log_line(line, line_num, self.ruleset)
+            if not activities:
+                continue
+
+            if self.tag_sources:
+                for activity in activities:
+                    activity['source'] = source
+
+            # Threshold rules only report once their window fills up
+            if self.correlator is not None:
+                activities = [activity for activity in activities if self.correlator.admit(activity)]
+                if not activities:
+                    continue
+
+            self.report.add(activities, source)
+            report_changed = True
+
+            # Repeats of a recently shown alert are counted, not displayed
+            for activity in activities:
+                if self.dedup.admit(activity):
+                    new_activities.append(activity)
+
+        # Truncated to an empty file
+        if tailer.rewinds != self._rewinds.get(source, 0):
+            self._rewinds[source] = tailer.rewinds
+            self.report.clear(source)
+            report_changed = True
+
+        if tailer.rotations != self._rotations.get(source, 0):
+            self._rotations[source] = tailer.rotations
+            print(f"{Fore.CYAN}{self._tag(source)}Log file rotated, following the new file.{Style.RESET_ALL}")
+
+        tailer.save_state()
+
+        # Check if file exists
+        if tailer.missing:
+            print(f"{Fore.YELLOW}{self._tag(source)}Warning: Log file not found, waiting...{Style.RESET_ALL}")
+
+        # Display new activities
+        if new_activities:
+            print(f"\n{Fore.YELLOW}[{datetime.now().strftime('%H:%M:%S')}] New suspicious activities detected:{Style.RESET_ALL}")
+
+            for activity in new_activities:
+                severity_color = {
+                    'low': Fore.GREEN,
+                    'medium': Fore.YELLOW,
+                    'high': Fore.RED,
+                    'critical': Fore.RED + Back.WHITE
+                }.get(activity['severity'], Fore.WHITE)
+
+                print(f"{Fore.CYAN}{self._tag(source)}Line {activity['line_number']}: {activity['rule']} {severity_color}(Severity: {activity['severity']}){Style.RESET_ALL}")
+                print(f"{Fore.WHITE}   Content: {activity['line']}{Style.RESET_ALL}")
+
+        suppressed = self.dedup.suppressed - suppressed
+        if suppressed:
+            print(f"{Fore.CYAN}{self._tag(source)}{suppressed} repeated alerts suppressed.{Style.RESET_ALL}")
+
+        # Update HTML report from a snapshot of the running totals if specified;
+        # it is written on the renderer thread so the event loop never waits on it
+        if self.renderer and report_changed:
+            self.renderer.submit(self._write_report, self.report.activities,
+                                 self.report.severity_counts, self.report.total)
+
+    def reload_rules(self, written=False):
+        """Switch to the rules file's new content if it changed and is valid."""
+        if self.reloader is not None:
+            ruleset = self.reloader.check(written)
+            if ruleset is not None:
+                self.use_rules(ruleset)
+
+    def use_rules(self, ruleset):
+        """Analyze the following lines with another rule set.
+
+        Threshold windows are keyed by rule index, so they start over.
+        """
+        self.ruleset = ruleset
+        self.correlator = Correlator() if ruleset.has_thresholds else None
+        print(f"{Fore.CYAN}Rules file changed, {len(ruleset)} rules reloaded.{Style.RESET_ALL}")
+
+    def _write_report(self, activities, severity_counts, total):
+        """Render the live HTML report (runs on the renderer thread)."""
+        generate_html_report(activities, self.html_output_file, self.report_label, self.rules_file,
+                             severity_counts, total, template_dir=self.template_dir, quiet=True)
+
+    def close(self):
+        """Wait for the last HTML report refresh to be written."""
+        if self.renderer:
+            self.renderer.close()
+
+    def print_dedup_summary(self):
+        """Print how many repeated alerts were suppressed, per rule."""
+        if not self.dedup.suppressed:
+            return
+        print(f"{Fore.CYAN}{self.dedup.suppressed} repeated alerts suppressed:{Style.RESET_ALL}")
+        for rule, count in self.dedup.suppressed_by_rule.most_common(5):
+            print(f"  {rule}: {count}")
+
+    def _tag(self, source):
+        """Prefix for console messages about one of several watched files."""
+        return f"[{source}] " if self.tag_sources else ''
+
+
+async def _follow(session, tailer, wakeup, watcher, interval):
+    """Process one file whenever it changes or its timeout expires."""
+    while True:
+        wakeup.clear()
+        try:
+            session.process(tailer)
+        except Exception as e:
+            print(f"{Fore.RED}Error during monitoring: {e}{Style.RESET_ALL}")
+            await asyncio.sleep(interval)
+            continue
+
+        # Re-check soon if a partial last line is waiting to be completed
+        timeout = interval if tailer.pending else watcher.timeout
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _watch(session, tailers, watcher, interval):
+    """Follow every file in a single event loop.
+
+    An event on the rules file reloads the rules without waiting for a log
+    file to change: right away once the writer has closed or renamed it.
+    """
+    loop = asyncio.get_running_loop()
+    wakeups = {os.path.abspath(tailer.log_file): asyncio.Event() for tailer in tailers}
+    rules_path = os.path.abspath(session.rules_file)
+
+    def on_events():
+        for path, mask in watcher.drain().items():
+            if path in wakeups:
+                wakeups[path].set()
+            if path == rules_path:
+                session.reload_rules(written=bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO)))
+
+    fd = watcher.fileno()
+    if fd is not None:
+        loop.add_reader(fd, on_events)
+    try:
+        await asyncio.gather(*(_follow(session, tailer, wakeups[os.path.abspath(tailer.log_file)],
+                                       watcher, interval) for tailer in tailers))
+    finally:
+        if fd is not None:
+            loop.remove_reader(fd)
+
 
+def _state_file_for(state_file, log_file, shared):
+    """Return the state file for one log when several share a --state-file."""
+    if not state_file or not shared:
+        return state_file
+    digest = hashlib.sha1(os.path.abspath(log_file).encode('utf-8')).hexdigest()[:12]
+    return f"{state_file}.{digest}"
 
-def watch_log_file(log_file, rules_file, output_file=None, html_output_file=None, interval=1.0):
+
+def watch_log_file(log_file, rules_file, output_file=None, html_output_file=None, interval=1.0,
+                   report_limit=REPORT_MAX_ACTIVITIES, backend='auto', state_file=None, max_console=None,
+                   html_page_size=HTML_PAGE_SIZE, template_dir=None, rule_timeout=None,
+                   dedup_size=DEDUP_MAX_SIZE, dedup_ttl=DEDUP_TTL):
     """Watch log file for changes and analyze new entries in real-time."""
-    from .rules import load_rules
+    watch_log_files([log_file], rules_file, output_file, html_output_file, interval,
+                    report_limit, backend, state_file, max_console, html_page_size, template_dir,
+                    rule_timeout, dedup_size, dedup_ttl)
+
+
+def watch_log_files(log_files, rules_file, output_file=None, html_output_file=None, interval=1.0,
+                    report_limit=REPORT_MAX_ACTIVITIES, backend='auto', state_file=None, max_console=None,
+                    html_page_size=HTML_PAGE_SIZE, template_dir=None, rule_timeout=None,
+                    dedup_size=DEDUP_MAX_SIZE, dedup_ttl=DEDUP_TTL):
+    """Watch several log files from one event loop with a shared rule set.
+
+    With rule_timeout a rule taking longer than that many seconds on one
+    line is quarantined instead of stalling the session. An alert repeating
+    one shown less than dedup_ttl seconds ago, up to dedup_size remembered
+    alerts, is only counted. The rules file is reloaded whenever it
+    changes, keeping the previous rules if the new ones are invalid.
+    """
+    multiple = len(log_files) > 1
 
     print(f"{Fore.GREEN}EventSieve - Real-time Log Monitoring Started{Style.RESET_ALL}")
-    print(f"Log file: {log_file}")
+    if multiple:
+        print(f"Log files ({len(log_files)}):")
+        for log_file in log_files:
+            print(f"  {log_file}")
+    else:
+        print(f"Log file: {log_files[0]}")
     print(f"Rules file: {rules_file}")
     print(f"Check interval: {interval} seconds")
     print(f"{Fore.GREEN}{'-' * 60}{Style.RESET_ALL}")
 
-    # Load rules
+    # Load rules; an edit made from here on is picked up by the reloader
+    reloader = RulesReloader(rules_file, rule_timeout)
     rules = load_rules(rules_file)
-    if not rules:
+    if not rules or not validate_rules(rules):
         return
 
+    # Compile every pattern once for the whole session
+    ruleset = CompiledRuleSet(rules, timeout=rule_timeout)
+
+    # Wake up on file events where possible, polling otherwise; the rules
+    # file is watched too so an edit is picked up while the logs are quiet
+    watcher = create_backend(backend, interval)
+    try:
+        for watched_file in log_files + [rules_file]:
+            watcher.add(watched_file)
+    except OSError as e:
+        print(f"{Fore.YELLOW}Warning: Cannot watch {watched_file} for events ({e}), falling back to polling.{Style.RESET_ALL}")
+        watcher.close()
+        watcher = PollingBackend(interval)
+
+    print(f"Watch backend: {watcher.name}")
     print(f"{len(rules)} rules loaded.")
     print(f"{Fore.CYAN}Monitoring for new log entries... (Press Ctrl+C to stop){Style.RESET_ALL}")
 
-    # Track last position in file
-    last_position = 0
-    last_activities = []
+    # Track position and line count per file, resuming from the state file
+    tailers = [LogTailer(log_file, _state_file_for(state_file, log_file, multiple)) for log_file in log_files]
+    report_label = ', '.join(log_files)
+    session = WatchSession(ruleset, rules_file, html_output_file, report_label, report_limit, multiple,
+                           template_dir, AlertDeduplicator(dedup_size, dedup_ttl), reloader)
 
     try:
-        while True:
-            try:
-                # Check if file exists
-                if not Path(log_file).exists():
-                    print(f"{Fore.YELLOW}Warning: Log file not found, waiting...{Style.RESET_ALL}")
-                    time.sleep(interval)
-                    continue
-
-                # Get current file size
-                current_size = Path(log_file).stat().st_size
-
-                # If file was truncated or reset, reset position
-                if current_size < last_position:
-                    last_position = 0
-
-                # If file has grown, read new content
-                if current_size > last_position:
-                    new_activities = []
-
-                    with open(log_file, 'r', encoding='utf-8') as f:
-                        f.seek(last_position)
-                        lines = f.readlines()
-
-                        for line_num_offset, line in enumerate(lines, 1):
-                            line = line.strip()
-                            if not line:
-                                continue
-
-                            # Calculate actual line number in file
-                            actual_line_num = sum(1 for _ in open(log_file, 'r', encoding='utf-8')) - len(lines) + line_num_offset
-
-                            # Analyze the line
-                            activities = analyze_log_line(line, actual_line_num, rules)
-
-                            for activity in activities:
-                                # Check if this activity is new (not in last_activities)
-                                if activity not in last_activities:
-                                    new_activities.append(activity)
-
-                    # Display new activities
-                    if new_activities:
-                        print(f"\n{Fore.YELLOW}[{datetime.now().strftime('%H:%M:%S')}] New suspicious activities detected:{Style.RESET_ALL}")
-
-                        for activity in new_activities:
-                            severity_color = {
-                                'low': Fore.GREEN,
-                                'medium': Fore.YELLOW,
-                                'high': Fore.RED,
-                                'critical': Fore.RED + Back.WHITE
-                            }.get(activity['severity'], Fore.WHITE)
-
-                            print(f"{Fore.CYAN}Line {activity['line_number']}: {activity['rule']} {severity_color}(Severity: {activity['severity']}){Style.RESET_ALL}")
-                            print(f"{Fore.WHITE}   Content: {activity['line']}{Style.RESET_ALL}")
-
-                        last_activities.extend(new_activities)
-
-                        # Keep only last 100 activities to prevent memory issues
-                        if len(last_activities) > 100:
-                            last_activities = last_activities[-100:]
-
-                        # Update HTML report if specified
-                        if html_output_file:
-                            all_activities = []
-                            # Read all activities from file for complete report
-                            try:
-                                with open(log_file, 'r', encoding='utf-8') as f:
-                                    for line_num, line in enumerate(f, 1):
-                                        line = line.strip()
-                                        if not line:
-                                            continue
-
-                                        activities = analyze_log_line(line, line_num, rules)
-                                        all_activities.extend(activities)
-
-                                generate_html_report(all_activities, html_output_file, log_file, rules_file)
-                                print(f"{Fore.GREEN}HTML report updated.{Style.RESET_ALL}")
-                            except Exception as e:
-                                print(f"{Fore.YELLOW}Warning: Could not update HTML report: {e}{Style.RESET_ALL}")
-
-                    # Update last position
-                    last_position = current_size
-
-                # Wait before next check
-                time.sleep(interval)
-
-            except KeyboardInterrupt:
-                print(f"\n{Fore.YELLOW}Monitoring stopped by user.{Style.RESET_ALL}")
-                break
-            except Exception as e:
-                print(f"{Fore.RED}Error during monitoring: {e}{Style.RESET_ALL}")
-                time.sleep(interval)
-
+        asyncio.run(_watch(session, tailers, watcher, interval))
     except KeyboardInterrupt:
         print(f"\n{Fore.GREEN}Real-time monitoring stopped.{Style.RESET_ALL}")
+        session.print_dedup_summary()
+    finally:
+        watcher.close()
+        session.close()
+        for tailer in tailers:
+            tailer.save_state()
+            tailer.close()
 
     # Generate final reports if requested
     if output_file or html_output_file:
         print(f"{Fore.CYAN}Generating final reports...{Style.RESET_ALL}")
 
-        # Analyze complete log file
-        from .analyzer import analyze_log
-        activities = analyze_log(log_file, rules)
+        # Analyze complete log files, collecting activities for both reports
+        from .analyzer import iter_activities
+        from ..reports.spool import ActivitySpool
+
+        def all_activities():
+            for log_file in log_files:
+                for activity in iter_activities(log_file, session.ruleset):
+                    if multiple:
+                        activity['source'] = log_file
+                    yield activity
 
+        activities = ActivitySpool(all_activities())
         if output_file:
             from ..reports.text_report import generate_report
-            generate_report(activities, output_file)
+            generate_report(activities, output_file, max_console)
 
         if html_output_file:
-            generate_html_report(activities, html_output_file, log_file, rules_file)
\ No newline at end of file
+            generate_html_report(activities, html_output_file, report_label, rules_file,
+                                 page_size=html_page_size, template_dir=template_dir)
@@ -5,16 +5,37 @@ EventSieve - Rule-Based Log Analysis Tool
 Main entry point for the application.
 """
 
+import glob
 import sys
 from pathlib import Path
 
 from .ui.cli import setup_parser
 from .ui.interactive import interactive_mode
-from .core.rules import load_rules
-from .core.analyzer import analyze_log
-from .core.watcher import watch_log_file
+from .core.rules import load_rules, validate_rules
+from .core.matcher import CompiledRuleSet
+from .core.aggregator import Aggregator
+from .core.analyzer import analyze_log, iter_activities, iter_log_files
+from .core.cache import AnalysisCache
+from .core.profiler import ProfilingRuleSet, print_profile
+from .core.watcher import watch_log_files
 from .reports.text_report import generate_report
 from .reports.html_report import generate_html_report
+from .reports.spool import ActivitySpool
+from .utils.system_logs import find_rotated_logs
+
+
+def expand_log_files(patterns):
+    """Expand glob patterns in the given log file arguments, keeping order."""
+    log_files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"Error: No log files match: {pattern}")
+            sys.exit(1)
+        for match in matches:
+            if match not in log_files:
+                log_files.append(match)
+    return log_files
 
 
 def main():
@@ -25,12 +46,13 @@ def main():
         args = parser.parse_args()
 
         # Check file paths
-        log_path = Path(args.log_file)
+        log_files = expand_log_files(args.log_file)
         rules_path = Path(args.rules_file)
 
-        if not log_path.exists():
-            print(f"Error: Log file not found: {log_path}")
-            sys.exit(1)
+        for log_file in log_files:
+            if not Path(log_file).exists():
+                print(f"Error: Log file not found: {log_file}")
+                sys.exit(1)
 
         if not rules_path.exists():
             print(f"Error: Rules file not found: {rules_path}")
@@ -39,11 +61,23 @@ def main():
         # Check if watch mode is enabled
         if args.watch:
             # Start real-time monitoring
-            watch_log_file(str(log_path), str(rules_path), args.output, args.html_output, args.interval)
+            watch_log_files(log_files, str(rules_path), args.output, args.html_output, args.interval,
+                            backend=args.watch_backend, state_file=args.state_file,
+                            max_console=args.max_console, html_page_size=args.html_page_size,
+                            template_dir=args.template_dir, rule_timeout=args.rule_timeout,
+                            dedup_size=args.dedup_size, dedup_ttl=args.dedup_ttl)
             return
 
+        if len(log_files) > 1:
+            print("Error: Multiple log files are only supported in watch mode")
+            sys.exit(1)
+        log_path = Path(log_files[0])
+
         print("EventSieve - Starting Log Analysis...")
         print(f"Log file: {log_path}")
+        log_sources = find_rotated_logs(str(log_path)) if args.include_rotated else [str(log_path)]
+        if len(log_sources) > 1:
+            print(f"Rotated files: {len(log_sources) - 1} (oldest first: {', '.join(log_sources[:-1])})")
         print(f"Rules file: {rules_path}")
         if args.output:
             print(f"Output file: {args.output}")
@@ -51,12 +85,58 @@ def main():
 
         # Load rules
         rules = load_rules(str(rules_path))
-        if not rules:
+        if not rules or not validate_rules(rules):
             sys.exit(1)
         print(f"{len(rules)} rules loaded.")
 
-        # Analyze log
-        activities = analyze_log(str(log_path), rules)
+        # Profiling times every search in this process, so run serially and
+        # without cached results
+        profile = args.profile_rules or args.profile_json
+        workers = args.workers
+        if profile:
+            rules = ProfilingRuleSet(rules, timeout=args.rule_timeout)
+            if workers != 1:
+                print("Rule profiling runs with a single worker.")
+                workers = 1
+        else:
+            rules = CompiledRuleSet(rules, timeout=args.rule_timeout)
+
+        # Analyze log into a compact table both reports can read, collecting
+        # statistics in the same pass when they are wanted
+        show_summary = args.summary or args.summary_only
+        summary = Aggregator() if show_summary or args.summary_json else None
+        if len(log_sources) > 1:
+            # Rotated archives and the live file read as one continuous log
+            if args.summary_only:
+                activities = None
+                summary.extend(iter_log_files(log_sources, rules, workers))
+            else:
+                activities = ActivitySpool(iter_log_files(log_sources, rules, workers, summary))
+        elif args.summary_only:
+            activities = None
+            summary.extend(iter_activities(str(log_path), rules, workers, use_mmap=args.mmap))
+        else:
+            cache = None if args.no_cache or profile else AnalysisCache(args.cache_dir)
+            activities = analyze_log(str(log_path), rules, workers, summary, cache, args.mmap)
+
+        if profile:
+            print_profile(rules)
+            if args.profile_json:
+                try:
+                    rules.save(args.profile_json)
+                    print(f"Rule profile saved: {args.profile_json}")
+                except OSError as e:
+                    print(f"Error: Could not save rule profile: {e}")
+
+        if args.summary_json:
+            try:
+                summary.save(args.summary_json)
+                print(f"Statistics saved: {args.summary_json}")
+            except OSError as e:
+                print(f"Error: Could not save statistics: {e}")
+
+        if not show_summary:
+            summary = None
 
         # Generate reports
         output_file = args.output
@@ -66,10 +146,12 @@ def main():
             output_file = f"{log_name}_analysis.txt"
             print(f"No TXT output file specified, saving to: {output_file}")
 
-        generate_report(activities, output_file)
+        generate_report(activities, output_file, args.max_console, summary)
 
         if args.html_output:
-            generate_html_report(activities, args.html_output, str(log_path), str(rules_path))
+            generate_html_report(activities, args.html_output, str(log_path), str(rules_path),
+                                 page_size=args.html_page_size, template_dir=args.template_dir,
+                                 summary=summary)
     else:
         # Interactive mode
         interactive_mode()
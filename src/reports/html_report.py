@@ -5,35 +5,132 @@ Generates HTML reports using Jinja2 templates.
 """
 
 import os
+import threading
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 from colorama import Fore, Style
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 
+from ..core.activity import ActivityTable
+from .spool import ActivitySpool
 
-def generate_html_report(activities, output_file, log_file, rules_file):
-    """Generate HTML report."""
+# Activity cards per HTML page; larger reports are split into several pages
+HTML_PAGE_SIZE = 10000
+
+TEMPLATE_NAME = "report_template.html"
+DEFAULT_TEMPLATE_DIR = Path(__file__).parent.parent.parent
+
+# One Jinja2 environment per template directory, shared by every report
+_environments = {}
+_environments_lock = threading.Lock()
+
+
+def get_environment(template_dir=None):
+    """Return the cached Jinja2 environment for a template directory.
+
+    Templates are parsed and compiled once per process, and the compiled
+    bytecode is also cached on disk for the next run. The loader still
+    checks the file's modification time, so edits to the template apply.
+    """
+    template_dir = os.path.abspath(template_dir or DEFAULT_TEMPLATE_DIR)
+    with _environments_lock:
+        environment = _environments.get(template_dir)
+        if environment is None:
+            environment = Environment(loader=FileSystemLoader(template_dir),
+                                      bytecode_cache=FileSystemBytecodeCache())
+            _environments[template_dir] = environment
+    return environment
+
+
+class BackgroundRenderer:
+    """Run report rendering jobs on a worker thread.
+
+    Only the newest pending job is kept: a refresh requested while an older
+    one is still waiting replaces it, since the older one would be out of
+    date anyway.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='html-report', daemon=True)
+        self._thread.start()
+
+    def submit(self, job, *args, **kwargs):
+        """Schedule job(*args, **kwargs), replacing any job not started yet."""
+        with self._condition:
+            self._pending = (job, args, kwargs)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                job, args, kwargs = self._pending
+                self._pending = None
+
+            try:
+                job(*args, **kwargs)
+            except Exception as e:
+                print(f"{Fore.YELLOW}Warning: Could not update HTML report: {e}{Style.RESET_ALL}")
+
+    def close(self):
+        """Finish the pending job and stop the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+def _page_file_names(output_file, page_count):
+    """Return the file names of the report pages; the first is output_file itself."""
+    path = Path(output_file)
+    return [path.name] + [f"{path.stem}_page{page}{path.suffix}" for page in range(2, page_count + 1)]
+
+
+def generate_html_report(activities, output_file, log_file, rules_file,
+                         severity_counts=None, total_activities=None, page_size=HTML_PAGE_SIZE,
+                         template_dir=None, summary=None, quiet=False):
+    """Generate HTML report in pages of page_size activities, 0 for a single page.
+
+    quiet skips the success messages, e.g. for live refreshes in watch mode.
+    """
     try:
-        # Read template file
-        template_path = Path(__file__).parent.parent.parent / "report_template.html"
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_content = f.read()
+        # Compiled once per process and reused
+        template = get_environment(template_dir).get_template(TEMPLATE_NAME)
 
-        template = Template(template_content)
+        if activities is not None and not hasattr(activities, '__len__'):
+            activities = ActivitySpool(activities)
 
         # Calculate statistics
-        total_activities = len(activities)
+        if summary is not None:
+            if severity_counts is None:
+                severity_counts = summary.severity_counts
+            if total_activities is None:
+                total_activities = summary.total
 
-        severity_counts = {
-            'low': 0,
-            'medium': 0,
-            'high': 0,
-            'critical': 0
-        }
+        if total_activities is None:
+            total_activities = len(activities)
+
+        if severity_counts is None and isinstance(activities, (ActivityTable, ActivitySpool)):
+            severity_counts = activities.severity_counts()
+
+        if severity_counts is None:
+            severity_counts = {
+                'low': 0,
+                'medium': 0,
+                'high': 0,
+                'critical': 0
+            }
 
-        for activity in activities:
-            severity = activity.get('severity', 'low')
-            severity_counts[severity] += 1
+            for activity in activities:
+                severity = activity.get('severity', 'low')
+                severity_counts[severity] += 1
 
         # Calculate percentage (show minimum 5%)
         max_count = max(severity_counts.values()) if severity_counts.values() else 1
@@ -46,6 +143,7 @@ def generate_html_report(activities, output_file, log_file, rules_file):
         template_vars = {
             'timestamp': datetime.now().strftime('%d.%m.%Y %H:%M:%S'),
             'total_activities': total_activities,
+            'shown_activities': len(activities) if activities is not None else 0,
             'activities': activities,
             'log_file': log_file,
             'rules_file': rules_file,
@@ -56,17 +154,55 @@ def generate_html_report(activities, output_file, log_file, rules_file):
             'low_percentage': severity_percentages['low'],
             'medium_percentage': severity_percentages['medium'],
             'high_percentage': severity_percentages['high'],
-            'critical_percentage': severity_percentages['critical']
+            'critical_percentage': severity_percentages['critical'],
+            'summary': summary
         }
 
-        # Generate HTML
-        html_content = template.render(**template_vars)
+        if summary is not None:
+            timeline = summary.timeline()
+            peak = max((count for _, count in timeline), default=1)
+            template_vars.update({
+                'top_rules': summary.top_rules(),
+                'top_ips': summary.top_ips(),
+                'top_users': summary.top_users(),
+                'busiest_minutes': summary.busiest_minutes(),
+                'timeline': [(hour, count, max(1, count * 100 // peak)) for hour, count in timeline]
+            })
+
+        shown_activities = template_vars['shown_activities']
+        if page_size and 0 < page_size < shown_activities:
+            page_count = (shown_activities + page_size - 1) // page_size
+        else:
+            page_count = 1
+            page_size = max(shown_activities, 1)
+
+        page_names = _page_file_names(output_file, page_count)
+        template_vars['page_count'] = page_count
+        template_vars['page_urls'] = page_names
+
+        # Pages take consecutive slices of one pass over the activities
+        remaining = iter(activities) if page_count > 1 else None
+        for page in range(1, page_count + 1):
+            start = (page - 1) * page_size
+            end = min(start + page_size, shown_activities)
+            if page_count > 1:
+                template_vars['activities'] = list(islice(remaining, end - start))
+            template_vars['page'] = page
+            template_vars['first_activity'] = start + 1
+            template_vars['last_activity'] = end
 
-        # Write to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            # Generate HTML and write it to file as it renders
+            page_file = output_file if page == 1 else Path(output_file).with_name(page_names[page - 1])
+            with open(page_file, 'w', encoding='utf-8') as f:
+                for chunk in template.generate(**template_vars):
+                    f.write(chunk)
 
-        print(f"{Fore.GREEN}✓ HTML report generated: {output_file}{Style.RESET_ALL}")
+        if quiet:
+            return
+        if page_count > 1:
+            print(f"{Fore.GREEN}✓ HTML report generated: {output_file} ({page_count} pages){Style.RESET_ALL}")
+        else:
+            print(f"{Fore.GREEN}✓ HTML report generated: {output_file}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}To open in web browser: file://{Path(output_file).resolve()}{Style.RESET_ALL}")
 
     except Exception as e:
@@ -0,0 +1,95 @@
+"""
+EventSieve - Activity Spool Module
+
+Disk-backed buffer that lets a stream of activities be read more than once.
+"""
+
+import json
+import tempfile
+
+from ..core.activity import SEVERITIES, Activity
+
+# Activities are kept in memory up to this many bytes, then spill to disk
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class ActivitySpool:
+    """Collect a stream of activities without holding them all in memory.
+
+    Reports need the totals before the activity list, so a lazy activity
+    stream is written here once, counted on the way, and then iterated as
+    often as needed, one pass at a time. Only the rules and source names
+    stay in memory; each activity is a line number, a rule id, a source id,
+    the matched line and, when the rule captured any, its named groups.
+    """
+
+    def __init__(self, activities=()):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode='w+', encoding='utf-8')
+        self.count = 0
+        self.rules = []
+        self.sources = [None]
+        self._rule_ids = {}
+        self._source_ids = {None: 0}
+        self._severity_counts = dict.fromkeys(SEVERITIES, 0)
+        self.extend(activities)
+
+    def add(self, activity):
+        """Append one activity."""
+        rule = activity.compiled_rule
+        rule_id = self._rule_ids.get(rule)
+        if rule_id is None:
+            rule_id = self._rule_ids[rule] = len(self.rules)
+            self.rules.append(rule)
+
+        source = activity.source
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+
+        record = [activity.line_number, rule_id, source_id, activity.line]
+        if activity.captures:
+            record.append(activity.captures)
+        self._file.write(json.dumps(record))
+        self._file.write('\n')
+        if rule.severity in self._severity_counts:
+            self._severity_counts[rule.severity] += 1
+        self.count += 1
+
+    def extend(self, activities):
+        """Append every activity of an iterable."""
+        for activity in activities:
+            self.add(activity)
+
+    def severity_counts(self):
+        """Return the number of activities per severity."""
+        return dict(self._severity_counts)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        rules, sources = self.rules, self.sources
+        self._file.flush()
+        self._file.seek(0)
+        try:
+            for record in self._file:
+                line_number, rule_id, source_id, line, *captures = json.loads(record)
+                yield Activity(line_number, line, rules[rule_id], sources[source_id],
+                               captures[0] if captures else None)
+        finally:
+            # A pass stopped early must not leave new activities written mid-file
+            self._file.seek(0, 2)
+
+    def close(self):
+        """Discard the spooled activities."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -4,35 +4,133 @@ EventSieve - Text Report Module
 Generates text-based reports for console and file output.
 """
 
+import sys
 from colorama import Fore, Back, Style
 
+from .spool import ActivitySpool
+
+# Buffer size of the report file handle
+FILE_BUFFER_SIZE = 1024 * 1024
+
+SEVERITY_COLORS = {
+    'low': Fore.GREEN,
+    'medium': Fore.YELLOW,
+    'high': Fore.RED,
+    'critical': Fore.RED + Back.WHITE
+}
+
+# Width of the longest bar in the hourly timeline
+TIMELINE_WIDTH = 40
+
+
+class TextReportWriter:
+    """Write report entries one at a time to a text stream.
+
+    With color=False the same report is written without ANSI codes, which
+    is what ends up in report files.
+    """
+
+    def __init__(self, stream, color=True):
+        self.stream = stream
+        self.color = color
+
+    def _c(self, code):
+        return code if self.color else ''
+
+    def write_empty(self):
+        """Write the message for a run without findings."""
+        self.stream.write(f"{self._c(Fore.GREEN)}No suspicious activities found.{self._c(Style.RESET_ALL)}")
+
+    def write_header(self, total):
+        """Write the activity total."""
+        self.stream.write(f"{self._c(Fore.YELLOW)}Total {total} suspicious activities found:{self._c(Style.RESET_ALL)}\n\n")
+
+    def write_activity(self, i, activity):
+        """Write the i-th activity."""
+        c, reset, white = self._c, self._c(Style.RESET_ALL), self._c(Fore.WHITE)
+        severity_color = c(SEVERITY_COLORS.get(activity['severity'], Fore.WHITE))
+
+        entry = f"{c(Fore.CYAN)}{i}. Line {activity['line_number']}: {activity['rule']} {severity_color}(Severity: {activity['severity']}){reset}\n"
+        if activity.get('source'):
+            entry += f"{white}   Source: {activity['source']}{reset}\n"
+        entry += f"{white}   Content: {activity['line']}{reset}\n"
+        captures = getattr(activity, 'captures', None)
+        if captures:
+            fields = ' '.join(f"{name}={value}" for name, value in captures.items())
+            entry += f"{white}   Fields: {fields}{reset}\n"
+        entry += f"{white}   Pattern: {activity['pattern']}{reset}\n\n"
+        self.stream.write(entry)
+
+    def write_omitted(self, count):
+        """Note how many activities were left out."""
+        self.stream.write(f"{self._c(Fore.YELLOW)}... {count} more activities not shown.{self._c(Style.RESET_ALL)}\n\n")
+
+    def _write_counts(self, title, counts):
+        """Write a titled table of (label, count) pairs."""
+        if not counts:
+            return
+        self.stream.write(f"{self._c(Fore.CYAN)}{title}:{self._c(Style.RESET_ALL)}\n")
+        for label, count in counts:
+            self.stream.write(f"  {count:>8}  {label}\n")
+        self.stream.write("\n")
+
+    def write_summary(self, summary):
+        """Write the statistics of an Aggregator."""
+        severities = ', '.join(f"{severity} {summary.severity_counts[severity]}"
+                               for severity in ('critical', 'high', 'medium', 'low'))
+        self.stream.write(f"{self._c(Fore.YELLOW)}Summary{self._c(Style.RESET_ALL)}\n")
+        self.stream.write(f"By severity: {severities}\n\n")
+
+        self._write_counts("Top rules", summary.top_rules())
+        self._write_counts("Top source IPs", summary.top_ips())
+        self._write_counts("Top users", summary.top_users())
+        self._write_counts("Busiest minutes", summary.busiest_minutes())
+
+        timeline = summary.timeline()
+        if timeline:
+            peak = max(count for _, count in timeline)
+            self.stream.write(f"{self._c(Fore.CYAN)}Activity per hour:{self._c(Style.RESET_ALL)}\n")
+            for hour, count in timeline:
+                bar = '#' * max(1, count * TIMELINE_WIDTH // peak)
+                self.stream.write(f"  {hour}  {bar} {count}\n")
+            self.stream.write("\n")
+
+    def write_report(self, activities, limit=None, summary=None):
+        """Write the whole report, listing at most limit activities.
+
+        activities may be None when only the summary is reported.
+        """
+        total = summary.total if summary is not None else len(activities)
+        if not total:
+            self.write_empty()
+            return
+
+        self.write_header(total)
+        if summary is not None:
+            self.write_summary(summary)
+        if activities is None:
+            return
 
-def generate_report(activities, output_file=None):
-    """Generate report."""
-    if not activities:
-        report = f"{Fore.GREEN}No suspicious activities found.{Style.RESET_ALL}"
-    else:
-        report = f"{Fore.YELLOW}Total {len(activities)} suspicious activities found:{Style.RESET_ALL}\n\n"
         for i, activity in enumerate(activities, 1):
-            severity_color = {
-                'low': Fore.GREEN,
-                'medium': Fore.YELLOW,
-                'high': Fore.RED,
-                'critical': Fore.RED + Back.WHITE
-            }.get(activity['severity'], Fore.WHITE)
+            if limit is not None and i > limit:
+                self.write_omitted(len(activities) - limit)
+                break
+            self.write_activity(i, activity)
+
 
-            report += f"{Fore.CYAN}{i}. Line {activity['line_number']}: {activity['rule']} {severity_color}(Severity: {activity['severity']}){Style.RESET_ALL}\n"
-            report += f"{Fore.WHITE}   Content: {activity['line']}{Style.RESET_ALL}\n"
-            report += f"{Fore.WHITE}   Pattern: {activity['pattern']}{Style.RESET_ALL}\n\n"
+def generate_report(activities, output_file=None, max_console=None, summary=None):
+    """Generate report; activities may be lazy, or None with a summary."""
+    if activities is not None and not hasattr(activities, '__len__'):
+        activities = ActivitySpool(activities)
 
     if output_file:
         try:
             # Plain report for file
-            plain_report = report.replace(Fore.GREEN, '').replace(Fore.YELLOW, '').replace(Fore.RED, '').replace(Fore.CYAN, '').replace(Fore.WHITE, '').replace(Back.WHITE, '').replace(Style.RESET_ALL, '')
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(plain_report)
+            with open(output_file, 'w', encoding='utf-8', buffering=FILE_BUFFER_SIZE) as f:
+                TextReportWriter(f, color=False).write_report(activities, summary=summary)
             print(f"{Fore.GREEN}Report saved: {output_file}{Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}Error: Error saving report: {e}{Style.RESET_ALL}")
 
-    print(report)
\ No newline at end of file
+    TextReportWriter(sys.stdout).write_report(activities, max_console, summary)
+    print()
@@ -6,6 +6,22 @@ Command-line argument parsing and setup.
 
 import argparse
 
+from ..core.backends import BACKENDS
+from ..core.matcher import DEFAULT_RULE_TIMEOUT
+from ..core.watcher import DEDUP_MAX_SIZE, DEDUP_TTL
+from ..reports.html_report import HTML_PAGE_SIZE
+
+
+def non_negative_int(value):
+    """Parse an integer argument that must not be negative."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
 
 def setup_parser():
     """Setup and return the argument parser."""
@@ -17,13 +33,20 @@ Example usage:
   python -m src.main -l access.log -r rules.json -o report.txt
   python -m src.main --log-file /var/log/auth.log --rules-file custom_rules.json
   python -m src.main -l sample.log -r rules.json --watch --interval 1.0
+  python -m src.main -l '/var/log/*.log' /var/log/syslog -r rules.json --watch
+  python -m src.main -l /var/log/syslog.1 -r rules.json --workers 8
+  python -m src.main -l /var/log/auth.log -r rules.json --include-rotated --workers 4
+  python -m src.main -l big.log -r rules.json -o report.txt --max-console 50
+  python -m src.main -l /var/log/auth.log -r rules.json --summary-only --summary-json stats.json
+  python -m src.main -l /var/log/syslog -r rules.json --profile-rules --profile-json profile.json
         """
     )
 
     parser.add_argument(
         '-l', '--log-file',
         required=True,
-        help='Path to the log file to analyze'
+        nargs='+',
+        help='Path to the log file to analyze; watch mode accepts several files or glob patterns'
     )
 
     parser.add_argument(
@@ -42,6 +65,19 @@ Example usage:
         help='Path to save HTML report (optional)'
     )
 
+    parser.add_argument(
+        '--html-page-size',
+        type=non_negative_int,
+        default=HTML_PAGE_SIZE,
+        metavar='N',
+        help=f'Activities per HTML report page, 0 for a single page (default: {HTML_PAGE_SIZE})'
+    )
+
+    parser.add_argument(
+        '--template-dir',
+        help='Directory with a custom report_template.html for HTML reports (optional)'
+    )
+
     parser.add_argument(
         '--watch',
         action='store_true',
@@ -52,7 +88,112 @@ Example usage:
         '--interval',
         type=float,
         default=1.0,
-        help='Check interval in seconds for watch mode (default: 1.0)'
+        help='Check interval in seconds for polling watch mode (default: 1.0)'
+    )
+
+    parser.add_argument(
+        '--watch-backend',
+        choices=BACKENDS,
+        default='auto',
+        help='How watch mode waits for changes: inotify events or polling (default: auto)'
+    )
+
+    parser.add_argument(
+        '--state-file',
+        help='Save the watch position to this file and resume from it on restart (optional)'
+    )
+
+    parser.add_argument(
+        '--dedup-ttl',
+        type=float,
+        default=DEDUP_TTL,
+        metavar='SECONDS',
+        help=f'Watch mode: suppress repeats of an alert shown less than this long ago, 0 to show all '
+             f'(default: {DEDUP_TTL:g})'
+    )
+
+    parser.add_argument(
+        '--dedup-size',
+        type=int,
+        default=DEDUP_MAX_SIZE,
+        metavar='N',
+        help=f'Watch mode: distinct alerts remembered for de-duplication (default: {DEDUP_MAX_SIZE})'
+    )
+
+    parser.add_argument(
+        '--max-console',
+        type=int,
+        metavar='N',
+        help='List at most N activities in the terminal; the report file stays complete (optional)'
+    )
+
+    parser.add_argument(
+        '--summary',
+        action='store_true',
+        help='Add per-rule, source IP, user and hourly statistics to the reports'
+    )
+
+    parser.add_argument(
+        '--summary-only',
+        action='store_true',
+        help='Report only the statistics without listing individual activities'
+    )
+
+    parser.add_argument(
+        '--summary-json',
+        metavar='FILE',
+        help='Save the statistics as JSON to this file (optional)'
+    )
+
+    parser.add_argument(
+        '--include-rotated',
+        action='store_true',
+        help='Also analyze rotated archives of the log file (e.g. auth.log.1, auth.log.2.gz), oldest first'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory for cached analysis results (default: ~/.cache/eventsieve)'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Analyze the whole log file without reading or writing the cache'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of worker processes for analysis, 0 for all cores (default: 1)'
+    )
+
+    parser.add_argument(
+        '--rule-timeout',
+        type=float,
+        default=DEFAULT_RULE_TIMEOUT,
+        metavar='SECONDS',
+        help=f'Disable a rule that searches one line for longer than this, 0 for no limit '
+             f'(default: {DEFAULT_RULE_TIMEOUT})'
+    )
+
+    parser.add_argument(
+        '--profile-rules',
+        action='store_true',
+        help='Time every rule and print the slowest ones after the analysis (serial, no cache)'
+    )
+
+    parser.add_argument(
+        '--profile-json',
+        metavar='FILE',
+        help='Save the rule profile as JSON (implies --profile-rules)'
+    )
+
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Scan the memory-mapped log in blocks and decode only candidate lines (serial analysis of uncompressed files)'
     )
 
     return parser
\ No newline at end of file
@@ -41,6 +41,7 @@ def show_menu():
     print(f"{Fore.CYAN}║{Style.RESET_ALL} {Fore.GREEN}[5]{Style.RESET_ALL} Generate HTML Report                                  {Fore.CYAN}║{Style.RESET_ALL}")
     print(f"{Fore.CYAN}║{Style.RESET_ALL} {Fore.GREEN}[6]{Style.RESET_ALL} Start Real-time Monitoring                            {Fore.CYAN}║{Style.RESET_ALL}")
     print(f"{Fore.CYAN}║{Style.RESET_ALL} {Fore.GREEN}[7]{Style.RESET_ALL} Current Settings                                      {Fore.CYAN}║{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}║{Style.RESET_ALL} {Fore.GREEN}[8]{Style.RESET_ALL} Toggle Analysis Cache                                 {Fore.CYAN}║{Style.RESET_ALL}")
     print(f"{Fore.CYAN}║{Style.RESET_ALL} {Fore.RED}[0]{Style.RESET_ALL} Exit                                                  {Fore.CYAN}║{Style.RESET_ALL}")
     print(f"{Fore.CYAN}╚═══════════════════════════════════════════════════════════╝{Style.RESET_ALL}")
     print()
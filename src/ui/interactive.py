@@ -8,9 +8,11 @@ from pathlib import Path
 from colorama import Fore, Style
 
 from .display import show_banner, show_menu, get_file_path
-from ..core.rules import load_rules
+from ..core.rules import load_rules, validate_rules
 from ..core.analyzer import analyze_log
-from ..core.watcher import watch_log_file
+from ..core.matcher import DEFAULT_RULE_TIMEOUT, CompiledRuleSet
+from ..core.cache import AnalysisCache
+from ..core.watcher import watch_log_files
 from ..reports.text_report import generate_report
 from ..reports.html_report import generate_html_report
 from ..utils.system_logs import scan_system_logs, display_found_logs, select_log_files
@@ -24,14 +26,16 @@ def interactive_mode():
         'log_file': None,
         'rules_file': 'rules.json',
         'output_file': None,
-        'html_output_file': None
+        'html_output_file': None,
+        'watch_files': [],
+        'use_cache': True
     }
 
     try:
         while True:
             show_menu()
 
-            choice = input(f"{Fore.GREEN}Your choice (0-7): {Style.RESET_ALL}").strip()
+            choice = input(f"{Fore.GREEN}Your choice (0-8): {Style.RESET_ALL}").strip()
 
             if choice == '0':
                 print(f"{Fore.YELLOW}Goodbye!{Style.RESET_ALL}")
@@ -55,7 +59,10 @@ def interactive_mode():
                                 config['log_file'] = selected_files[0]
                                 print(f"{Fore.GREEN}✓ Log file set: {selected_files[0]}{Style.RESET_ALL}")
                             else:
-                                print(f"{Fore.YELLOW}Multiple files selected. Please choose one for analysis.{Style.RESET_ALL}")
+                                # Real-time monitoring follows every selected file
+                                config['watch_files'] = selected_files
+                                print(f"{Fore.YELLOW}Multiple files selected. Real-time monitoring will follow all of them.{Style.RESET_ALL}")
+                                print(f"{Fore.YELLOW}Please choose one for analysis.{Style.RESET_ALL}")
                                 # Show numbered list for final selection
                                 for i, file_path in enumerate(selected_files, 1):
                                     print(f"{i}. {file_path}")
@@ -108,13 +115,14 @@ def interactive_mode():
 
                 # Load rules
                 rules = load_rules(config['rules_file'])
-                if not rules:
+                if not rules or not validate_rules(rules):
                     continue
 
                 print(f"{Fore.GREEN}{len(rules)} rules loaded.{Style.RESET_ALL}")
 
                 # Analyze log
-                activities = analyze_log(config['log_file'], rules)
+                activities = analyze_log(config['log_file'], CompiledRuleSet(rules, timeout=DEFAULT_RULE_TIMEOUT),
+                                         cache=AnalysisCache() if config['use_cache'] else None)
 
                 # Generate TXT report
                 output_file = config['output_file']
@@ -156,11 +164,12 @@ def interactive_mode():
 
                 # Load rules
                 rules = load_rules(config['rules_file'])
-                if not rules:
+                if not rules or not validate_rules(rules):
                     continue
 
                 # Analyze log
-                activities = analyze_log(config['log_file'], rules)
+                activities = analyze_log(config['log_file'], CompiledRuleSet(rules, timeout=DEFAULT_RULE_TIMEOUT),
+                                         cache=AnalysisCache() if config['use_cache'] else None)
 
                 # Generate HTML report
                 generate_html_report(activities, html_file, config['log_file'], config['rules_file'])
@@ -194,8 +203,10 @@ def interactive_mode():
                 if not rules:
                     continue
 
-                # Start real-time monitoring
-                watch_log_file(config['log_file'], config['rules_file'], config['output_file'], config['html_output_file'], interval)
+                # Start real-time monitoring of every selected file
+                watch_files = config['watch_files'] if config['log_file'] in config['watch_files'] else [config['log_file']]
+                watch_log_files(watch_files, config['rules_file'], config['output_file'], config['html_output_file'], interval,
+                                rule_timeout=DEFAULT_RULE_TIMEOUT)
 
                 input(f"{Fore.CYAN}Press Enter to continue...{Style.RESET_ALL}")
                 show_banner()
@@ -203,12 +214,22 @@ def interactive_mode():
             elif choice == '7':
                 print(f"\n{Fore.CYAN}Current Settings:{Style.RESET_ALL}")
                 print(f"  Log File: {config['log_file'] or 'Not specified'}")
+                if config['log_file'] in config['watch_files']:
+                    print(f"  Monitored Files: {', '.join(config['watch_files'])}")
                 print(f"  Rules File: {config['rules_file'] or 'Not specified'}")
                 print(f"  TXT Report File: {config['output_file'] or 'Will not be saved'}")
                 print(f"  HTML Report File: {config['html_output_file'] or 'Not specified'}")
+                print(f"  Analysis Cache: {'On' if config['use_cache'] else 'Off'}")
                 input(f"{Fore.CYAN}Press Enter to continue...{Style.RESET_ALL}")
                 show_banner()
 
+            elif choice == '8':
+                config['use_cache'] = not config['use_cache']
+                if config['use_cache']:
+                    print(f"{Fore.GREEN}✓ Analysis cache enabled: re-runs only analyze appended lines{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.YELLOW}Analysis cache disabled: logs are analyzed in full and nothing is cached.{Style.RESET_ALL}")
+
             else:
                 print(f"{Fore.RED}Invalid choice!{Style.RESET_ALL}")
                 continue
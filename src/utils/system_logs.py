@@ -5,9 +5,13 @@ Automatically discovers system log files on Linux systems.
 """
 
 import os
+import re
 from pathlib import Path
 from typing import List, Dict
 
+# Suffixes logrotate gives rotated files: ".1", ".2.gz", "-20240101.xz", ...
+ROTATED_SUFFIX = re.compile(r'^(?:\.(\d+)|-(\d{8,10}))(?:\.(?:gz|bz2|xz))?$')
+
 
 def get_common_log_paths() -> List[str]:
     """Get common system log file paths."""
@@ -52,6 +56,40 @@ def get_common_log_paths() -> List[str]:
     return common_paths
 
 
+def find_rotated_logs(log_file: str) -> List[str]:
+    """Return the rotated archives of a log file followed by the file itself.
+
+    Archives are ordered oldest first: numbered ones (auth.log.3.gz,
+    auth.log.2.gz, auth.log.1) by descending number, dated ones
+    (auth.log-20240101) by date, and any mix of both by modification time.
+    """
+    path = Path(log_file)
+    numbered, dated = [], []
+
+    try:
+        entries = list(path.parent.iterdir())
+    except OSError:
+        entries = []
+
+    for entry in entries:
+        if not entry.name.startswith(path.name) or not entry.is_file():
+            continue
+        match = ROTATED_SUFFIX.match(entry.name[len(path.name):])
+        if not match:
+            continue
+        if match.group(1):
+            numbered.append((-int(match.group(1)), entry))
+        else:
+            dated.append((match.group(2), entry))
+
+    if numbered and dated:
+        rotated = sorted((entry for _, entry in numbered + dated), key=lambda entry: entry.stat().st_mtime)
+    else:
+        rotated = [entry for _, entry in sorted(numbered or dated)]
+
+    return [str(path.parent / entry.name) for entry in rotated] + [log_file]
+
+
 def scan_system_logs() -> List[Dict[str, str]]:
     """Scan system for available log files."""
     found_logs = []
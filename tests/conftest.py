@@ -0,0 +1,29 @@
+"""
+EventSieve - Test Configuration
+
+Shared fixtures for the pytest suite.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.rules import load_rules
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+@pytest.fixture(scope='session')
+def shipped_rules():
+    """The rules of the shipped rules.json."""
+    return load_rules(os.path.join(ROOT, 'rules.json'))
+
+
+@pytest.fixture(scope='session')
+def sample_lines():
+    """The lines of the shipped sample.log."""
+    with open(os.path.join(ROOT, 'sample.log'), encoding='utf-8') as f:
+        return f.read().splitlines()
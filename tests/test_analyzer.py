@@ -0,0 +1,92 @@
+"""
+EventSieve - Analyzer Tests
+
+Parallel analysis must report the same activities, with the same line
+numbers, as a single serial pass.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from src.core import analyzer
+from src.core.analyzer import analyze_log, iter_log_files
+from src.core.cache import AnalysisCache
+from src.core.matcher import CompiledRuleSet
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Split even small test files into several worker chunks."""
+    monkeypatch.setattr(analyzer, 'MIN_CHUNK_SIZE', 4096)
+
+
+def _write_log(path, sample_lines, repeat):
+    # Blank lines and a missing final newline shift chunk boundaries
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(repeat):
+            f.write('\n'.join(sample_lines))
+            f.write('\n\n' if i % 3 else '\n')
+        f.write("Oct 13 23:59:59 host kernel: last line kernel panic")
+
+
+def _rows(activities):
+    return [(activity.line_number, activity.line, activity.rule, activity.get('source'))
+            for activity in activities]
+
+
+def test_workers_match_serial_analysis(tmp_path, shipped_rules, sample_lines, small_chunks):
+    log = tmp_path / 'app.log'
+    _write_log(log, sample_lines, 20)
+
+    serial = analyze_log(str(log), CompiledRuleSet(shipped_rules), workers=1)
+    parallel = analyze_log(str(log), CompiledRuleSet(shipped_rules), workers=3)
+    assert len(analyzer._chunk_ranges(str(log), 3)) > 1
+    assert _rows(parallel) == _rows(serial)
+    assert serial[-1].rule == 'System crash or kernel panic'
+
+
+def test_workers_match_serial_across_files(tmp_path, shipped_rules, sample_lines, small_chunks):
+    old = tmp_path / 'app.log.2.gz'
+    with gzip.open(old, 'wt', encoding='utf-8') as f:
+        f.write('\n'.join(sample_lines * 5) + '\n')
+    middle = tmp_path / 'app.log.1'
+    _write_log(middle, sample_lines, 10)
+    current = tmp_path / 'app.log'
+    _write_log(current, sample_lines, 3)
+    log_files = [str(old), str(middle), str(current)]
+
+    serial = list(iter_log_files(log_files, CompiledRuleSet(shipped_rules), workers=1))
+    parallel = list(iter_log_files(log_files, CompiledRuleSet(shipped_rules), workers=3))
+    assert _rows(parallel) == _rows(serial)
+    assert {activity.source for activity in serial} == set(log_files)
+
+
+def test_mmap_scan_matches_line_loop(tmp_path, shipped_rules, sample_lines, monkeypatch):
+    # Small blocks so lines are matched across many block boundaries
+    monkeypatch.setattr(analyzer, 'MMAP_BLOCK_SIZE', 1000)
+    log = tmp_path / 'app.log'
+    _write_log(log, sample_lines, 20)
+
+    plain = analyze_log(str(log), CompiledRuleSet(shipped_rules))
+    mapped = analyze_log(str(log), CompiledRuleSet(shipped_rules), use_mmap=True)
+    assert _rows(mapped) == _rows(plain)
+
+
+def test_worker_quarantine_reaches_the_parent(tmp_path, small_chunks, capsys):
+    log = tmp_path / 'app.log'
+    log.write_text(('a' * 40 + 'b\n' + 'x' * 200 + '\n') * 100)
+    rules = [
+        {"pattern": "^(a+)+$", "description": "Backtracking", "severity": "low"},
+        {"pattern": "aaa", "description": "Plain", "severity": "low"},
+    ]
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+
+    ruleset = CompiledRuleSet(rules, timeout=0.05)
+    activities = analyze_log(str(log), ruleset, workers=2, cache=cache)
+    assert [rule.description for rule in ruleset.quarantined] == ['Backtracking']
+    assert {activity.rule for activity in activities} == {'Plain'}
+
+    # Results missing the quarantined rule's matches are not cached
+    assert not os.path.exists(tmp_path / 'cache')
@@ -0,0 +1,128 @@
+"""
+EventSieve - Analysis Cache Tests
+
+Cached results must equal a full analysis after appends, and be dropped
+when the rules or the file change.
+"""
+
+import os
+import stat
+
+from src.core.analyzer import analyze_log
+from src.core.cache import AnalysisCache
+from src.core.matcher import CompiledRuleSet
+from src.reports.spool import ActivitySpool
+
+RULES = [
+    {"pattern": "Failed password for (?P<user>\\S+)", "description": "SSH failure", "severity": "medium"},
+    {"pattern": "segfault", "description": "Crash", "severity": "high"},
+]
+
+LINES = [
+    "Oct 13 10:15:01 host sshd[1]: Failed password for root from 10.0.0.5",
+    "Oct 13 10:15:02 host app: started",
+    "Oct 13 10:15:03 host kernel: app[7]: segfault at 0",
+]
+
+
+def _write(path, lines, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def _analyze(log, cache, rules=RULES):
+    return analyze_log(str(log), CompiledRuleSet(rules), cache=cache)
+
+
+def _load(cache, log, rules=RULES):
+    return cache.load(str(log), CompiledRuleSet(rules), os.stat(log))
+
+
+def test_append_analyzes_only_new_data(tmp_path, capsys):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    _write(log, LINES)
+    assert len(_analyze(log, cache)) == 2
+
+    _write(log, LINES, 'a')
+    capsys.readouterr()
+    cached = _analyze(log, cache)
+    assert "Reusing cached results for 3 lines" in capsys.readouterr().out
+
+    assert cached == _analyze(log, None)
+    assert [activity.line_number for activity in cached] == [1, 3, 4, 6]
+
+
+def test_unfinished_last_line_is_not_cached(tmp_path):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    log.write_text(LINES[0] + '\n' + LINES[2])
+    assert len(_analyze(log, cache)) == 2
+
+    _, offset, line_count = _load(cache, log)
+    assert (offset, line_count) == (len(LINES[0]) + 1, 1)
+
+
+def test_changed_rules_invalidate_entry(tmp_path):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    _write(log, LINES)
+    _analyze(log, cache)
+
+    assert _load(cache, log) is not None
+    assert _load(cache, log, RULES[:1]) is None
+
+
+def test_replaced_file_invalidates_entry(tmp_path):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    _write(log, LINES)
+    _analyze(log, cache)
+
+    # Same path, new inode (rotated by rename and recreated)
+    log.rename(tmp_path / 'app.log.1')
+    _write(log, LINES)
+    assert _load(cache, log) is None
+
+
+def test_rewritten_leading_bytes_invalidate_entry(tmp_path):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    _write(log, LINES)
+    _analyze(log, cache)
+
+    # Same inode, different content (copytruncate followed by new writes)
+    _write(log, [line.replace('10:15', '11:20') for line in LINES] + LINES)
+    assert _load(cache, log) is None
+    assert _analyze(log, cache) == _analyze(log, None)
+
+
+def test_entries_are_private(tmp_path):
+    log = tmp_path / 'app.log'
+    cache_dir = tmp_path / 'cache'
+    _write(log, LINES)
+    _analyze(log, AnalysisCache(str(cache_dir)))
+
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    for entry in os.listdir(cache_dir):
+        assert stat.S_IMODE(os.stat(cache_dir / entry).st_mode) == 0o600
+
+
+def test_captures_survive_the_cache(tmp_path):
+    log = tmp_path / 'app.log'
+    cache = AnalysisCache(str(tmp_path / 'cache'))
+    _write(log, LINES)
+    _analyze(log, cache)
+    _write(log, LINES, 'a')
+
+    cached = _analyze(log, cache)
+    assert [activity.captures for activity in cached] == [{'user': 'root'}, None, {'user': 'root'}, None]
+
+
+def test_captures_survive_the_report_spool(tmp_path):
+    log = tmp_path / 'app.log'
+    _write(log, LINES)
+    activities = _analyze(log, None)
+
+    with ActivitySpool(activities) as spool:
+        assert [activity.captures for activity in spool] == [{'user': 'root'}, None]
@@ -0,0 +1,88 @@
+"""
+EventSieve - Correlator Tests
+
+Threshold rules firing on N matches of one key within a time window.
+"""
+
+from src.core.analyzer import analyze_log_line
+from src.core.correlator import Correlator, parse_time
+from src.core.matcher import CompiledRuleSet
+from src.core.rules import validate_rules
+
+BURST = {"pattern": "Failed password", "description": "Burst", "severity": "high",
+         "threshold": 3, "window_seconds": 60, "group_by": "ip"}
+
+
+def _fired(lines, rules=(BURST,), correlator=None):
+    """Return the lines on which a threshold rule fired."""
+    if correlator is None:
+        correlator = Correlator()
+    ruleset = CompiledRuleSet(list(rules))
+    fired = []
+    for line_num, line in enumerate(lines, 1):
+        for activity in analyze_log_line(line, line_num, ruleset):
+            if correlator.admit(activity):
+                fired.append(line)
+    return fired
+
+
+def _failure(time, ip='10.0.0.1'):
+    return f"{time} host sshd[1]: Failed password for root from {ip} port 22"
+
+
+def test_fires_once_the_window_fills():
+    lines = [_failure(f"Oct 13 10:00:{second:02d}") for second in (0, 20, 40, 50)]
+    assert _fired(lines) == [lines[2]]
+
+
+def test_matches_spread_wider_than_the_window_do_not_fire():
+    lines = [_failure("Oct 13 10:00:00"), _failure("Oct 13 10:00:40"), _failure("Oct 13 10:01:01"),
+             _failure("Oct 13 10:01:30")]
+    assert _fired(lines) == [lines[3]]
+
+
+def test_keys_are_counted_separately():
+    lines = [_failure("Oct 13 10:00:00", '10.0.0.1'), _failure("Oct 13 10:00:01", '10.0.0.2'),
+             _failure("Oct 13 10:00:02", '10.0.0.1'), _failure("Oct 13 10:00:03", '10.0.0.2'),
+             _failure("Oct 13 10:00:04", '10.0.0.1')]
+    assert _fired(lines) == [lines[4]]
+
+
+def test_named_group_key_and_iso_timestamps():
+    rule = dict(BURST, pattern="Failed password for (?P<account>\\S+)", group_by='account')
+    lines = [f"2024-03-01T10:00:0{i} host sshd[1]: Failed password for {user} from 10.0.0.{i}"
+             for i, user in enumerate(['root', 'bob', 'root', 'root'])]
+    assert _fired(lines, [rule]) == [lines[3]]
+
+
+def test_new_year_does_not_join_distant_matches():
+    lines = [_failure("Dec 31 23:59:59"), _failure("Dec 31 23:59:59"), _failure("Jan  1 18:00:00")]
+    assert _fired(lines) == []
+
+
+def test_window_spanning_new_year_fires():
+    lines = [_failure("Dec 31 23:59:30"), _failure("Dec 31 23:59:50"), _failure("Jan  1 00:00:10")]
+    assert _fired(lines) == [lines[2]]
+
+
+def test_december_keys_expire_after_new_year():
+    correlator = Correlator()
+    _fired([_failure("Dec 31 23:50:00", f"10.0.1.{i}") for i in range(5)], correlator=correlator)
+    assert len(correlator) == 5
+
+    _fired([_failure("Jan  1 00:30:00")], correlator=correlator)
+    assert len(correlator) == 1
+
+
+def test_parse_time_places_syslog_timestamps_in_a_year():
+    assert parse_time("Jan  1 00:00:00 host x", 2001) - parse_time("Dec 31 23:59:59 host x", 2000) == 1
+    assert parse_time("no timestamp here") is None
+
+
+def test_unusable_threshold_rules_are_rejected_and_skipped(capsys):
+    bad = [dict(BURST, window_seconds=0), dict(BURST, threshold=True), dict(BURST, group_by='missing')]
+    for rule in bad:
+        assert not validate_rules([rule])
+        ruleset = CompiledRuleSet([rule])
+        assert len(ruleset) == 0 and ruleset.invalid == [rule]
+    assert validate_rules([BURST]) and len(CompiledRuleSet([BURST])) == 1
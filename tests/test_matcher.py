@@ -0,0 +1,208 @@
+"""
+EventSieve - Matcher Tests
+
+The keyword prefilter must find exactly the matches of the plain rule loop.
+"""
+
+import pytest
+
+from src.core.analyzer import analyze_log_line
+from src.core.matcher import CompiledRuleSet
+
+EDGE_RULES = [
+    {"pattern": "(?:failed|invalid) (password|user)", "description": "Branch", "severity": "medium"},
+    {"pattern": "seg(?:fault|mentation fault)|core dumped", "description": "Top-level branch", "severity": "high"},
+    {"pattern": "(?:ab)+cd", "description": "Repeat", "severity": "low"},
+    {"pattern": "x?yz{2,}", "description": "Optional prefix", "severity": "low"},
+    {"pattern": "(?:ERROR)?\\s*timeout", "description": "Optional group", "severity": "low"},
+    {"pattern": "^\\d+ ", "description": "No literal", "severity": "low"},
+    {"pattern": "café|naïve", "description": "Non-ASCII", "severity": "low"},
+    {"pattern": "STRASSE", "description": "Case folding", "severity": "low"},
+    {"pattern": "(?=.*root)sudo", "description": "Lookahead", "severity": "high"},
+    {"pattern": "end of line$", "description": "Anchored", "severity": "low"},
+]
+
+EDGE_LINES = [
+    "Failed password for root",
+    "INVALID USER admin",
+    "failed  password",
+    "Segmentation fault at 0x0",
+    "process 12: core dumped",
+    "ababcd and abcd",
+    "acd only",
+    "yzz yz",
+    "ERROR timeout",
+    "   timeout",
+    "42 things",
+    "Café au lait",
+    "CAFÉ",
+    "naive",
+    "Straße",
+    "strasse",
+    "sudo by root",
+    "root sudo",
+    "sudo by admin",
+    "the end of line",
+    "the end of line here",
+    "",
+    "ééé",
+]
+
+
+def _names(rules):
+    return [rule.description for rule in rules]
+
+
+@pytest.mark.parametrize('line', EDGE_LINES)
+def test_prefilter_matches_full_loop_on_edge_patterns(line):
+    plain = CompiledRuleSet(EDGE_RULES, prefilter=False)
+    filtered = CompiledRuleSet(EDGE_RULES, prefilter=True)
+    assert _names(filtered.match(line)) == _names(plain.match(line))
+
+
+def test_prefilter_matches_full_loop_on_shipped_rules(shipped_rules, sample_lines):
+    plain = CompiledRuleSet(shipped_rules, prefilter=False)
+    filtered = CompiledRuleSet(shipped_rules, prefilter=True)
+    for line in sample_lines + EDGE_LINES:
+        line = line.strip()
+        assert _names(filtered.match(line)) == _names(plain.match(line)), line
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_prefilter_matches_full_loop_over_a_file(shipped_rules, sample_lines, newline):
+    text = newline.join(sample_lines + EDGE_LINES) + newline
+    results = []
+    for prefilter in (False, True):
+        ruleset = CompiledRuleSet(shipped_rules, prefilter=prefilter)
+        results.append([(line_num, line, _names(matched))
+                        for line_num, line, matched, _ in ruleset.match_many(text.splitlines(keepends=True))])
+    assert results[0] == results[1]
+    assert results[0]
+
+
+def _match_many(ruleset, text):
+    return [(line_num, line, _names(matched))
+            for line_num, line, matched, _ in ruleset.match_many(text.splitlines(keepends=True))]
+
+
+def _match_block(ruleset, text):
+    return [(line_num, line, _names(matched))
+            for line_num, line, matched, _ in ruleset.match_block(text.encode('utf-8'))]
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+def test_block_scan_matches_line_loop(shipped_rules, sample_lines, newline):
+    ruleset = CompiledRuleSet(shipped_rules)
+    assert ruleset.block_scan
+
+    text = newline.join(sample_lines + EDGE_LINES) + newline
+    assert _match_block(ruleset, text) == _match_many(ruleset, text)
+
+
+def test_block_scan_on_edge_patterns_with_literals():
+    rules = [rule for rule in EDGE_RULES if rule['description'] not in ('No literal', 'Optional group')]
+    ruleset = CompiledRuleSet(rules)
+    assert ruleset.block_scan
+
+    text = '\r\n'.join(EDGE_LINES) + '\r\n'
+    assert _match_block(ruleset, text) == _match_many(CompiledRuleSet(rules, prefilter=False), text)
+
+
+EVIL_RULES = [
+    {"pattern": "^(a+)+$", "description": "Backtracking", "severity": "low"},
+    {"pattern": "aaa", "description": "Plain", "severity": "low"},
+]
+
+EVIL_LINE = 'a' * 40 + 'b'
+
+
+def test_slow_rule_is_quarantined(capsys):
+    ruleset = CompiledRuleSet(EVIL_RULES, timeout=0.05)
+
+    assert _names(ruleset.match(EVIL_LINE)) == ['Plain']
+    assert _names(ruleset.quarantined) == ['Backtracking']
+    assert "exceeded its 0.05s time budget" in capsys.readouterr().out
+
+    # Disabled for the rest of the run, without another warning
+    assert _names(ruleset.match('a' * 10)) == ['Plain']
+    assert _names(ruleset.match(EVIL_LINE)) == ['Plain']
+    assert capsys.readouterr().out == ''
+
+
+FIELD_RULES = [
+    {"pattern": "^nginx$", "field": "format", "description": "Nginx line", "severity": "low"},
+    {"pattern": "^/admin", "field": "path", "description": "Admin path", "severity": "medium"},
+    {"pattern": "^sshd$", "field": "program", "description": "SSH daemon", "severity": "low"},
+    {"pattern": "^10\\.0\\.0\\.5$", "field": "addresses", "description": "Never a string match", "severity": "low"},
+    {"pattern": "^4\\d\\d$", "field": "status", "description": "Client error", "severity": "low"},
+]
+
+FIELD_LINES = [
+    '10.0.0.5 - - [13/Oct/2024:10:15:01 +0000] "GET /admin/login HTTP/1.1" 404 512 "-" "curl/8.0"',
+    'Oct 13 10:15:01 host sshd[42]: Failed password for root from 10.0.0.5 port 2222 ssh2',
+    'Oct 13 10:15:01 host SSHD[42]: accepted',
+    'plain text mentioning nginx and /admin',
+]
+
+
+@pytest.mark.parametrize('line', FIELD_LINES)
+def test_field_rules_match_with_and_without_prefilter(line):
+    plain = CompiledRuleSet(FIELD_RULES, prefilter=False)
+    filtered = CompiledRuleSet(FIELD_RULES, prefilter=True)
+    assert _names(filtered.match(line)) == _names(plain.match(line))
+
+
+def test_field_rule_on_derived_field():
+    ruleset = CompiledRuleSet(FIELD_RULES)
+    assert _names(ruleset.match(FIELD_LINES[0])) == ['Nginx line', 'Admin path', 'Client error']
+    assert _names(ruleset.match(FIELD_LINES[3])) == []
+
+
+def test_named_groups_are_captured_at_match_time():
+    rules = [
+        {"pattern": "Failed password for (?P<user>\\S+) from (?P<src_ip>[\\d.]+) port (?P<port>\\d+)",
+         "description": "SSH failure", "severity": "medium"},
+        {"pattern": "Failed password", "description": "Plain", "severity": "low"},
+    ]
+    captures = {}
+    matched = CompiledRuleSet(rules).match(FIELD_LINES[1], captures)
+
+    assert _names(matched) == ['SSH failure', 'Plain']
+    assert captures == {0: {'user': 'root', 'src_ip': '10.0.0.5', 'port': 2222}}
+
+    captured, plain = analyze_log_line(FIELD_LINES[1], 1, CompiledRuleSet(rules))
+    assert captured.captures == captures[0]
+    assert plain.captures is None
+    assert captured.fields['program'] == 'sshd'
+
+
+ROUTED_RULES = [
+    {"pattern": "reject", "applies_to": ["postfix"], "description": "Postfix reject", "severity": "medium"},
+    {"pattern": "reject", "applies_to": ["Mail Server"], "description": "Mail reject", "severity": "low"},
+    {"pattern": "reject", "applies_to": ["sshd"], "description": "SSH reject", "severity": "low"},
+    {"pattern": "reject", "description": "Any reject", "severity": "low"},
+]
+
+ROUTED_LINES = [
+    'Oct 13 10:15:01 mail postfix/smtpd[123]: NOQUEUE: reject: RCPT from unknown[10.0.0.5]',
+    'Oct 13 10:15:01 mail postfix[123]: reject: header Subject',
+    'Oct 13 10:15:01 host sshd[42]: reject connection from 10.0.0.5',
+    'Oct 13 10:15:01 host cron[7]: reject nothing',
+    'reject without a program tag',
+]
+
+
+def test_routing_matches_sub_program_tags():
+    ruleset = CompiledRuleSet(ROUTED_RULES)
+    assert _names(ruleset.match(ROUTED_LINES[0])) == ['Postfix reject', 'Mail reject', 'Any reject']
+    assert _names(ruleset.match(ROUTED_LINES[1])) == ['Postfix reject', 'Mail reject', 'Any reject']
+    assert _names(ruleset.match(ROUTED_LINES[2])) == ['SSH reject', 'Any reject']
+    assert _names(ruleset.match(ROUTED_LINES[3])) == ['Any reject']
+    assert len(ruleset.match(ROUTED_LINES[4])) == 4
+
+
+@pytest.mark.parametrize('line', ROUTED_LINES)
+def test_routed_rules_match_with_and_without_prefilter(line):
+    plain = CompiledRuleSet(ROUTED_RULES, prefilter=False)
+    filtered = CompiledRuleSet(ROUTED_RULES, prefilter=True)
+    assert _names(filtered.match(line)) == _names(plain.match(line))
@@ -0,0 +1,148 @@
+"""
+EventSieve - Tailer Tests
+
+Following a growing log file with a running line count.
+"""
+
+import pytest
+
+from src.core.compression import open_log
+from src.core.tailer import LogTailer
+
+
+def _append(path, data):
+    with open(path, 'ab') as f:
+        f.write(data.encode('utf-8'))
+
+
+def _batch_lines(path):
+    """Return (line_number, line) as the batch analyzer numbers the lines."""
+    with open_log(str(path)) as f:
+        return [(line_num, line.strip()) for line_num, line in enumerate(f, 1) if line.strip()]
+
+
+def test_appended_lines_are_read_once(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("one\ntwo\n")
+    tailer = LogTailer(str(log))
+
+    assert list(tailer.read_lines()) == [(1, 'one'), (2, 'two')]
+    assert list(tailer.read_lines()) == []
+
+    _append(log, "three\n")
+    assert list(tailer.read_lines()) == [(3, 'three')]
+
+
+def test_partial_line_waits_until_completed(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("one\ntw")
+    tailer = LogTailer(str(log))
+
+    assert list(tailer.read_lines()) == [(1, 'one')]
+    assert tailer.pending
+
+    _append(log, "o\n")
+    assert list(tailer.read_lines()) == [(2, 'two')]
+    assert not tailer.pending
+
+
+def test_truncate_restarts_the_line_count(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("one\ntwo\nthree\n")
+    tailer = LogTailer(str(log))
+    assert len(list(tailer.read_lines())) == 3
+
+    log.write_text("new\n")
+    assert list(tailer.read_lines()) == [(1, 'new')]
+    assert tailer.rewinds == 1
+
+
+@pytest.mark.parametrize('text', [
+    "one\r\ntwo\r\n\r\nthree\r\n",
+    "one\rtwo\r\rthree\r",
+    "one\r\ntwo\rthree\n\rfour\n",
+])
+def test_line_numbers_match_batch_analysis(tmp_path, text):
+    log = tmp_path / 'app.log'
+    log.write_bytes(text.encode('utf-8'))
+    tailer = LogTailer(str(log))
+
+    lines = list(tailer.read_lines())
+    lines += list(tailer.read_lines())
+    assert lines == _batch_lines(log)
+
+
+def test_crlf_split_across_polls(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_bytes(b"one\r")
+    tailer = LogTailer(str(log))
+
+    # Held back while it may still be the first half of \r\n
+    assert list(tailer.read_lines()) == []
+    assert list(tailer.read_lines()) == [(1, 'one')]
+
+    _append(log, "\ntwo\r\n")
+    assert list(tailer.read_lines()) == [(2, 'two')]
+    assert _batch_lines(log) == [(1, 'one'), (2, 'two')]
+
+
+def test_rename_drains_old_file_then_follows_new_one(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("one\n")
+    tailer = LogTailer(str(log))
+    assert list(tailer.read_lines()) == [(1, 'one')]
+
+    # Written just before logrotate renamed the file away
+    _append(log, "two\n")
+    log.rename(tmp_path / 'app.log.1')
+    log.write_text("three\n")
+
+    assert list(tailer.read_lines()) == [(2, 'two'), (1, 'three')]
+    assert tailer.rotations == 1
+
+    _append(log, "four\n")
+    assert list(tailer.read_lines()) == [(2, 'four')]
+
+
+def test_copytruncate_refilled_past_position_is_detected(tmp_path):
+    log = tmp_path / 'app.log'
+    log.write_text("old line\n")
+    tailer = LogTailer(str(log))
+    assert list(tailer.read_lines()) == [(1, 'old line')]
+
+    # Truncated and refilled beyond the old position before the next poll
+    log.write_text("new first line\nnew second line\n")
+    assert list(tailer.read_lines()) == [(1, 'new first line'), (2, 'new second line')]
+    assert tailer.rewinds == 1
+
+
+def test_state_file_resumes_after_restart(tmp_path):
+    log = tmp_path / 'app.log'
+    state = tmp_path / 'app.state'
+    log.write_text("one\ntwo\n")
+    tailer = LogTailer(str(log), str(state))
+    assert len(list(tailer.read_lines())) == 2
+    tailer.save_state()
+    tailer.close()
+
+    _append(log, "three\n")
+    resumed = LogTailer(str(log), str(state))
+    assert list(resumed.read_lines()) == [(3, 'three')]
+
+
+def test_state_file_resumes_in_rotated_file(tmp_path):
+    log = tmp_path / 'app.log'
+    state = tmp_path / 'app.state'
+    log.write_text("one\n")
+    tailer = LogTailer(str(log), str(state))
+    assert list(tailer.read_lines()) == [(1, 'one')]
+    tailer.save_state()
+    tailer.close()
+
+    # Rotated while the watcher was stopped
+    _append(log, "two\n")
+    log.rename(tmp_path / 'app.log.1')
+    log.write_text("three\n")
+
+    resumed = LogTailer(str(log), str(state))
+    assert list(resumed.read_lines()) == [(2, 'two'), (1, 'three')]
@@ -0,0 +1,162 @@
+"""
+EventSieve - Watcher Tests
+
+Watch sessions over several log files, alert de-duplication and rules
+file reloads.
+"""
+
+import json
+import os
+
+from src.core.analyzer import analyze_log_line
+from src.core.matcher import CompiledRuleSet
+from src.core.tailer import LogTailer
+from src.core.watcher import RULES_SETTLE_TIME, AlertDeduplicator, RulesReloader, WatchSession, normalize_line
+
+RULES = [
+    {"pattern": "Failed password", "description": "SSH failure", "severity": "medium"},
+    {"pattern": "kernel panic", "description": "Crash", "severity": "critical"},
+]
+
+
+def _session(rules=RULES, **kwargs):
+    return WatchSession(CompiledRuleSet(rules), 'rules.json', None, 'test', 100, True, **kwargs)
+
+
+def test_truncating_one_file_keeps_the_other_files_report(tmp_path):
+    auth = tmp_path / 'auth.log'
+    kern = tmp_path / 'kern.log'
+    auth.write_text("Failed password for root\nFailed password for bob\n")
+    kern.write_text("kernel panic\n")
+    tailers = [LogTailer(str(auth)), LogTailer(str(kern))]
+
+    session = _session()
+    for tailer in tailers:
+        session.process(tailer)
+    assert session.report.total == 3
+
+    # copytruncate of auth.log only
+    auth.write_text("Failed password for eve\n")
+    session.process(tailers[0])
+
+    assert session.report.total == 2
+    assert session.report.severity_counts == {'low': 0, 'medium': 1, 'high': 0, 'critical': 1}
+    assert sorted(activity['line'] for activity in session.report.activities) == [
+        'Failed password for eve', 'kernel panic']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _alert(line, rules=RULES):
+    return analyze_log_line(line, 1, CompiledRuleSet(rules))[0]
+
+
+def test_normalize_line_keeps_ip_addresses():
+    line = "Oct 13 10:15:01 host sshd[123]: Failed password for root from 10.0.0.5 port 2222"
+    assert normalize_line(line) == " host sshd[#]: Failed password for root from 10.0.0.5 port #"
+
+
+def test_repeats_are_suppressed_until_ttl_expires():
+    clock = FakeClock()
+    dedup = AlertDeduplicator(max_size=10, ttl=60, clock=clock)
+
+    assert dedup.admit(_alert("Oct 13 10:15:01 sshd[1]: Failed password from 1.1.1.1 port 1000"))
+    clock.now = 30
+    assert not dedup.admit(_alert("Oct 13 10:15:31 sshd[2]: Failed password from 1.1.1.1 port 2000"))
+    assert dedup.admit(_alert("Oct 13 10:15:31 sshd[2]: Failed password from 2.2.2.2 port 2000"))
+    assert dedup.suppressed == 1
+    assert dedup.suppressed_by_rule == {'SSH failure': 1}
+
+    clock.now = 61
+    assert dedup.admit(_alert("Oct 13 10:16:02 sshd[3]: Failed password from 1.1.1.1 port 3000"))
+    assert len(dedup) == 2
+
+
+def test_oldest_alert_is_evicted_when_full():
+    dedup = AlertDeduplicator(max_size=2, ttl=60, clock=FakeClock())
+    first, second, third = (_alert(f"Failed password from 10.0.0.{i}") for i in range(3))
+
+    assert dedup.admit(first) and dedup.admit(second) and dedup.admit(third)
+    assert dedup.evictions == 1
+    assert dedup.admit(first)
+    assert not dedup.admit(third)
+
+
+def test_zero_size_or_ttl_shows_every_alert():
+    alert = _alert("Failed password from 10.0.0.1")
+    for dedup in (AlertDeduplicator(max_size=0), AlertDeduplicator(ttl=0)):
+        assert dedup.admit(alert) and dedup.admit(alert)
+
+
+def test_threshold_alerts_are_never_suppressed():
+    rules = [{"pattern": "Failed password", "description": "Burst", "severity": "high",
+              "threshold": 2, "window_seconds": 60, "group_by": "ip"}]
+    dedup = AlertDeduplicator(clock=FakeClock())
+    alert = _alert("Failed password from 10.0.0.1", rules)
+    assert dedup.admit(alert) and dedup.admit(alert)
+
+
+def _save(path, rules, mtime_ns):
+    path.write_text(rules if isinstance(rules, str) else json.dumps(rules))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_changed_rules_load_once_the_file_settles(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    _save(rules_file, RULES, 1)
+    clock = FakeClock()
+    reloader = RulesReloader(str(rules_file), clock=clock)
+    assert reloader.check() is None
+
+    _save(rules_file, RULES[:1], 2)
+    assert reloader.check() is None
+    clock.now = RULES_SETTLE_TIME
+    assert len(reloader.check()) == 1
+    assert reloader.check() is None and reloader.reloads == 1
+
+
+def test_partial_write_is_not_reported(tmp_path, capsys):
+    rules_file = tmp_path / 'rules.json'
+    _save(rules_file, RULES, 1)
+    clock = FakeClock()
+    reloader = RulesReloader(str(rules_file), clock=clock)
+
+    # The save is still being written at the first checks
+    _save(rules_file, json.dumps(RULES[:1])[:20], 2)
+    assert reloader.check() is None
+    clock.now = RULES_SETTLE_TIME / 2
+    _save(rules_file, RULES[:1], 3)
+    assert reloader.check() is None
+    assert capsys.readouterr().out == ''
+
+    clock.now = RULES_SETTLE_TIME * 2
+    assert len(reloader.check()) == 1
+    assert capsys.readouterr().out == ''
+
+
+def test_finished_write_loads_right_away(tmp_path):
+    rules_file = tmp_path / 'rules.json'
+    _save(rules_file, RULES, 1)
+    reloader = RulesReloader(str(rules_file), clock=FakeClock())
+
+    _save(rules_file, RULES[:1], 2)
+    assert len(reloader.check(written=True)) == 1
+
+
+def test_invalid_rules_keep_the_previous_rules(tmp_path, capsys):
+    rules_file = tmp_path / 'rules.json'
+    _save(rules_file, RULES, 1)
+    session = _session(reloader=RulesReloader(str(rules_file), clock=FakeClock()))
+    previous = session.ruleset
+
+    for mtime_ns, rules in enumerate(['[{"pattern": "x"', [dict(RULES[0], pattern='(bad')]], 2):
+        _save(rules_file, rules, mtime_ns)
+        session.reload_rules(written=True)
+        assert session.ruleset is previous
+        assert "keeping the previous rules" in capsys.readouterr().out